@@ -5,15 +5,26 @@
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from datetime import datetime
-from services.chat_service import get_chat_service
+from config.settings import settings
+from services.chat_service import ChatService, get_chat_service
 from utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Request banners are only emitted with ENABLE_DEBUG_LOGGING
+_BAR = "═" * 60
+
+# Keep proxies/CDNs from buffering or rewriting the event stream
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive",
+}
+
 router = APIRouter(prefix="/api", tags=["chat"])
 
 
@@ -38,12 +49,21 @@ class ChatResponse(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+def resolve_chat_service(http_request: Request) -> ChatService:
+    """Chat service created during startup (falls back to lazy init)"""
+    chat_service = getattr(http_request.app.state, "chat_service", None)
+    return chat_service or get_chat_service()
+
+
 # ─────────────────────────────────────────────────────────────
 #  🚀 Chat Endpoints
 # ─────────────────────────────────────────────────────────────
 
 @router.post("/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(
+    request: ChatRequest,
+    chat_service: ChatService = Depends(resolve_chat_service)
+):
     """
     ┌─────────────────────────────────────────────┐
     │  🌊 Streaming chat endpoint                 │
@@ -51,18 +71,17 @@ async def chat_stream(request: ChatRequest):
     └─────────────────────────────────────────────┘
     """
     
-    logger.info("═" * 60)
-    logger.info("🌊 STREAMING CHAT REQUEST")
-    logger.info("═" * 60)
-    logger.info(f"   └─ Query: {request.query[:50]}...")
-    logger.info(f"   └─ History: {len(request.history)} messages")
-    logger.info(f"   └─ RAG enabled: {request.use_rag}")
+    if settings.ENABLE_DEBUG_LOGGING:
+        logger.info(_BAR)
+        logger.info("🌊 STREAMING CHAT REQUEST")
+        logger.info(_BAR)
+        logger.info(f"   └─ Query: {request.query[:50]}...")
+        logger.info(f"   └─ History: {len(request.history)} messages")
+        logger.info(f"   └─ RAG enabled: {request.use_rag}")
     
     if not request.query:
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
-    chat_service = get_chat_service()
-    
     return StreamingResponse(
         chat_service.stream_chat_response(
             query=request.query,
@@ -71,12 +90,16 @@ async def chat_stream(request: ChatRequest):
             use_rag=request.use_rag,
             file_ids=request.file_ids
         ),
-        media_type="text/event-stream"
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
     )
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    chat_service: ChatService = Depends(resolve_chat_service)
+):
     """
     ┌─────────────────────────────────────────────┐
     │  💬 Non-streaming chat endpoint             │
@@ -84,17 +107,16 @@ async def chat(request: ChatRequest):
     └─────────────────────────────────────────────┘
     """
     
-    logger.info("═" * 60)
-    logger.info("💬 CHAT REQUEST")
-    logger.info("═" * 60)
-    logger.info(f"   └─ Query: {request.query[:50]}...")
-    logger.info(f"   └─ RAG enabled: {request.use_rag}")
+    if settings.ENABLE_DEBUG_LOGGING:
+        logger.info(_BAR)
+        logger.info("💬 CHAT REQUEST")
+        logger.info(_BAR)
+        logger.info(f"   └─ Query: {request.query[:50]}...")
+        logger.info(f"   └─ RAG enabled: {request.use_rag}")
     
     if not request.query:
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
-    chat_service = get_chat_service()
-    
     try:
         result = await chat_service.get_chat_response(
             query=request.query,
@@ -5,11 +5,12 @@
 """
 
 import os
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
-from fastapi.responses import FileResponse
+from typing import List, AsyncGenerator
+from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from config.settings import settings
 from utils.file_handler import validate_file, save_upload_file
-from services.document_processor import process_document
+from services.document_processor import process_document, flush_vector_store
 from services.vector_store import get_vector_store
 from utils.logger import setup_logger
 
@@ -20,6 +21,7 @@ router = APIRouter(prefix="/api", tags=["documents"])
 
 @router.post("/upload")
 async def upload_document(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...)
 ):
@@ -35,20 +37,32 @@ async def upload_document(
     logger.info(f"   └─ Filename: {file.filename}")
     logger.info(f"   └─ Content-Type: {file.content_type}")
     
+    if settings.VECTOR_STORE_READ_ONLY:
+        raise HTTPException(status_code=403, detail="Uploads are disabled on this read-only instance")
+    
     # Validate file
-    validate_file(file)
+    ext = validate_file(file)
     
-    # Save file to disk
-    file_path, file_id = await save_upload_file(file)
+    # Save file to disk; the cleanup it schedules spares uploads still processing
+    vector_store = get_vector_store()
+    file_path, file_id = await save_upload_file(
+        file, ext, background_tasks, vector_store.processing_files
+    )
     
     # Process document in background
     logger.info("🔄 Starting background processing...")
     
     # Mark as processing immediately so status endpoint finds it
-    vector_store = get_vector_store()
+    vector_store.register_file(file_id, file_path)
     vector_store.mark_as_processing(file_id)
     
-    background_tasks.add_task(process_document, file_path, file_id)
+    # Hand off to the bounded worker pool (falls back to a background task)
+    doc_queue = getattr(request.app.state, "doc_queue", None)
+    if doc_queue is not None:
+        await doc_queue.put((file_path, file_id))
+    else:
+        background_tasks.add_task(process_document, file_path, file_id)
+        background_tasks.add_task(flush_vector_store)
     
     return {
         "status": "processing",
@@ -66,18 +80,22 @@ async def get_analysis_status(file_id: str):
     └─────────────────────────────────────────────┘
     """
     
-    logger.info(f"📊 Status check for: {file_id}")
-    
     vector_store = get_vector_store()
     status = vector_store.get_document_status(file_id)
     
-    logger.info(f"   └─ Status: {status['status']}")
+    # Polled by the frontend; only log when debugging
+    if settings.ENABLE_DEBUG_LOGGING:
+        logger.info(f"📊 Status check for: {file_id}")
+        logger.info(f"   └─ Status: {status['status']}")
     
-    return {
+    response = {
         "file_id": file_id,
         "status": status.get("status", "processing"),
         "chunks_count": status.get("chunks_count", 0)
     }
+    if "warning" in status:
+        response["warning"] = status["warning"]
+    return response
 
 
 @router.get("/documents/{file_id}/view")
@@ -90,7 +108,13 @@ async def view_document(file_id: str):
     
     logger.info(f"👁️ Document view request: {file_id}")
     
-    # Search for file in upload directory
+    # Fast path: indexed lookup
+    file_path = get_vector_store().get_file_path(file_id)
+    if file_path and os.path.isfile(file_path):
+        logger.info(f"   └─ Serving: {file_path}")
+        return FileResponse(file_path)
+    
+    # Fallback: search for file in upload directory
     for filename in os.listdir(settings.UPLOAD_DIR):
         if filename.startswith(file_id):
             file_path = os.path.join(settings.UPLOAD_DIR, filename)
@@ -118,12 +142,21 @@ async def get_document_text(file_id: str):
         logger.warning(f"   └─ No chunks found for: {file_id}")
         raise HTTPException(status_code=404, detail="Document content not found")
     
-    logger.info(f"   └─ Returning {len(chunks)} chunks")
+    logger.info(f"   └─ Streaming {len(chunks)} chunks")
     
-    return {
-        "content": "\n\n".join(chunks),
-        "chunks_count": len(chunks)
-    }
+    return StreamingResponse(
+        _stream_chunks(chunks),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Chunks-Count": str(len(chunks))}
+    )
+
+
+async def _stream_chunks(chunks: List[str]) -> AsyncGenerator[str, None]:
+    """Emit chunks one at a time instead of materializing the whole document"""
+    for i, chunk in enumerate(chunks):
+        if i:
+            yield "\n\n"
+        yield chunk
 
 
 @router.post("/clear-all")
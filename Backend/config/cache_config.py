@@ -11,6 +11,17 @@ CACHE_TYPE = "memory" # 'memory' or 'redis'
 MAX_CACHE_SIZE = 1000 # Number of items
 DEFAULT_TTL = 3600    # Seconds (1 hour)
 
+# Query-level caches (embeddings & vector search results)
+QUERY_CACHE_TTL = 300 # Seconds (5 minutes)
+SEARCH_CACHE_SIZE = 256 # VectorStore.search results kept (cleared when chunks are added)
+
 # Redis Settings (Future)
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
+
+# Semantic response cache (paraphrased repeats skip the LLM call)
+ENABLE_SEMANTIC_CACHE = True
+SEMANTIC_CACHE_THRESHOLD = 0.92      # Cosine similarity needed for a hit
+SEMANTIC_CACHE_MAX_ENTRIES = 1000
+SEMANTIC_CACHE_RECAP_WEIGHT = 0.15   # Share of the session recap in the lookup vector
+SEMANTIC_CACHE_REPLAY_CHARS = 20     # Chars per SSE event when replaying a hit
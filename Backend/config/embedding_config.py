@@ -0,0 +1,12 @@
+"""
+═══════════════════════════════════════════════════════════════
+ 🧠 Embedding Model Configuration
+═══════════════════════════════════════════════════════════════
+"""
+
+# Plain constants, so the chunker (parse-pool processes) can read them
+# without importing torch / sentence-transformers via services.embeddings
+
+MODEL_NAME = "all-mpnet-base-v2"
+EMBEDDING_DIMENSION = 768  # Better quality than the 384-d MiniLM models
+MAX_SEQ_LENGTH = 384       # Tokens the model sees; longer input is truncated
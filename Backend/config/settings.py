@@ -5,116 +5,157 @@
 """
 
 import os
-from typing import List
-from pydantic_settings import BaseSettings
-from dotenv import load_dotenv
+from functools import cached_property
+from typing import FrozenSet, Tuple
+from pydantic import Field, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-load_dotenv()
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
     
+    # Env vars and Backend/.env are parsed once by pydantic-settings
+    model_config = SettingsConfigDict(
+        env_file=os.path.join(BASE_DIR, ".env"),
+        extra="ignore"
+    )
+    
     # ─────────────────────────────────────────────────────────
     #  🔐 Azure OpenAI Configuration
     # ─────────────────────────────────────────────────────────
-    AZURE_OPENAI_API_KEY: str = os.getenv("AZURE_OPENAI_API_KEY", "")
-    AZURE_OPENAI_API_BASE: str = os.getenv("AZURE_OPENAI_API_BASE", "")
-    AZURE_OPENAI_DEPLOYMENT_NAME: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-5-chat")
-    AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
-    AZURE_OPENAI_EMBEDDING_DEPLOYMENT: str = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-ada-002")
+    AZURE_OPENAI_API_KEY: str = ""
+    AZURE_OPENAI_API_BASE: str = ""
+    AZURE_OPENAI_DEPLOYMENT_NAME: str = "gpt-5-chat"
+    AZURE_OPENAI_API_VERSION: str = "2024-02-01"
+    AZURE_OPENAI_EMBEDDING_DEPLOYMENT: str = "text-embedding-ada-002"
+    AZURE_MAX_CONCURRENCY: int = 16
+    AZURE_MAX_RETRIES: int = 3
+    AZURE_PROMPT_CACHE_KEY: str = ""
     
     # ─────────────────────────────────────────────────────────
     #  🤖 GPT-5 Model Configuration
     # ─────────────────────────────────────────────────────────
-    GPT_MAX_COMPLETION_TOKENS: int = int(os.getenv("GPT_MAX_COMPLETION_TOKENS", "4000"))
-    GPT_MAX_CONTEXT_TOKENS: int = int(os.getenv("GPT_MAX_CONTEXT_TOKENS", "120000"))
-    GPT_RESERVED_TOKENS: int = int(os.getenv("GPT_RESERVED_TOKENS", "2000"))
+    GPT_MAX_COMPLETION_TOKENS: int = 4000
+    GPT_MAX_CONTEXT_TOKENS: int = 120000
+    GPT_RESERVED_TOKENS: int = 2000
     
     # Temperature & Creativity Settings
-    GPT_TEMPERATURE: float = float(os.getenv("GPT_TEMPERATURE", "0.7"))
-    GPT_TOP_P: float = float(os.getenv("GPT_TOP_P", "0.95"))
-    GPT_FREQUENCY_PENALTY: float = float(os.getenv("GPT_FREQUENCY_PENALTY", "0.0"))
-    GPT_PRESENCE_PENALTY: float = float(os.getenv("GPT_PRESENCE_PENALTY", "0.0"))
+    GPT_TEMPERATURE: float = 0.7
+    GPT_TOP_P: float = 0.95
+    GPT_FREQUENCY_PENALTY: float = 0.0
+    GPT_PRESENCE_PENALTY: float = 0.0
     
     # Response Settings
-    GPT_STREAM_ENABLED: bool = os.getenv("GPT_STREAM_ENABLED", "true").lower() == "true"
-    GPT_STREAMING_CHUNK_SIZE: int = int(os.getenv("GPT_STREAMING_CHUNK_SIZE", "5"))
+    GPT_STREAM_ENABLED: bool = True
+    GPT_STREAMING_CHUNK_SIZE: int = 5
+    GPT_STREAM_FLUSH_CHARS: int = 4096
+    GPT_STREAM_FLUSH_INTERVAL_MS: int = 25
     
     # ─────────────────────────────────────────────────────────
     #  📁 File Storage Configuration
     # ─────────────────────────────────────────────────────────
-    UPLOAD_DIR: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
-    VECTOR_DB_PATH: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "vector_db")
-    MAX_FILE_SIZE_MB: int = int(os.getenv("MAX_FILE_SIZE_MB", "25"))
-    MAX_FILES_PER_UPLOAD: int = int(os.getenv("MAX_FILES_PER_UPLOAD", "5"))
-    ALLOWED_FILE_TYPES: str = os.getenv("ALLOWED_FILE_TYPES", "pdf,docx,txt,md")
+    UPLOAD_DIR: str = os.path.join(BASE_DIR, "uploads")
+    VECTOR_DB_PATH: str = os.path.join(BASE_DIR, "vector_db")
+    MAX_FILE_SIZE_MB: int = 25
+    MAX_FILES_PER_UPLOAD: int = 5
+    ALLOWED_FILE_TYPES: str = "pdf,docx,txt,md"
+    DOC_WORKERS: int = 2
+    DOC_QUEUE_SIZE: int = 128
+    PARSE_WORKERS: int = 0  # Parse/chunk processes (0 = one per CPU core)
     
     @property
     def MAX_FILE_SIZE(self) -> int:
         """Convert MB to bytes"""
         return self.MAX_FILE_SIZE_MB * 1024 * 1024
     
-    @property
-    def ALLOWED_FILE_TYPES_LIST(self) -> List[str]:
-        """Parse allowed file types from comma-separated string"""
-        return [ft.strip() for ft in self.ALLOWED_FILE_TYPES.split(",")]
+    @cached_property
+    def ALLOWED_FILE_TYPES_LIST(self) -> Tuple[str, ...]:
+        """Parse allowed file types from comma-separated string (once)"""
+        return tuple(ft.strip() for ft in self.ALLOWED_FILE_TYPES.split(","))
+    
+    @cached_property
+    def ALLOWED_FILE_TYPES_SET(self) -> FrozenSet[str]:
+        """Allowed file types for O(1) membership checks"""
+        return frozenset(self.ALLOWED_FILE_TYPES_LIST)
 
     
     # ─────────────────────────────────────────────────────────
     #  🖼️ Multimodal Configuration
     # ─────────────────────────────────────────────────────────
-    ENABLE_MULTIMODAL: bool = os.getenv("ENABLE_MULTIMODAL", "true").lower() == "true"
-    OLLAMA_VISION_MODEL: str = os.getenv("OLLAMA_VISION_MODEL", "llama3.2-vision")
+    ENABLE_MULTIMODAL: bool = True
+    OLLAMA_VISION_MODEL: str = "llama3.2-vision"
 
     # ─────────────────────────────────────────────────────────
     #  🧠 RAG Configuration
     # ─────────────────────────────────────────────────────────
     # Chunking Settings
-    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
-    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
-    MIN_CHUNK_SIZE: int = int(os.getenv("MIN_CHUNK_SIZE", "100"))
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+    MIN_CHUNK_SIZE: int = 100
     
     # Retrieval Settings
-    TOP_K_RESULTS: int = int(os.getenv("TOP_K_RESULTS", "5"))
-    SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
-    MAX_CONTEXT_CHUNKS: int = int(os.getenv("MAX_CONTEXT_CHUNKS", "8"))
+    TOP_K_RESULTS: int = 5
+    SIMILARITY_THRESHOLD: float = 0.7
+    MAX_CONTEXT_CHUNKS: int = 8
     
     # Chunking Strategy
-    CHUNKING_STRATEGY: str = os.getenv("CHUNKING_STRATEGY", "recursive").lower()
-    AGENTIC_WINDOW_SIZE: int = int(os.getenv("AGENTIC_WINDOW_SIZE", "20"))
+    CHUNKING_STRATEGY: str = "recursive"
+    AGENTIC_WINDOW_SIZE: int = 20
     
     # ─────────────────────────────────────────────────────────
     #  🔍 HNSW Configuration
     # ─────────────────────────────────────────────────────────
-    HNSW_M: int = int(os.getenv("HNSW_M", "32"))
-    HNSW_EF_CONSTRUCTION: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
-    HNSW_EF_SEARCH: int = int(os.getenv("HNSW_EF_SEARCH", "100"))
-    EMBEDDING_DIMENSION: int = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 100
+    EMBEDDING_DIMENSION: int = 1536
+    VECTOR_QUANTIZATION: str = "none"  # "none" (FP32) or "binary" (1-bit + SQ8 rescoring)
+    VECTOR_STORE_READ_ONLY: bool = False  # mmap the saved index; uploads and clearing are refused
+    INDEX_FACTORY: str = ""  # faiss.index_factory string, e.g. "IVF4096,PQ64"; empty = HNSW flat
+    INDEX_TRAIN_SIZE: int = 10000  # Vectors buffered before training an IVF/PQ index
+    IVF_NPROBE: int = 16
+    ENABLE_MMR: bool = False  # Diversify vector hits with Maximal Marginal Relevance
+    MMR_LAMBDA: float = 0.5  # 1.0 = pure relevance, lower = more diverse
+    MMR_FETCH_FACTOR: int = 4  # Candidates fetched per result when MMR is on
+    
+    # ─────────────────────────────────────────────────────────
+    #  🧠 Local Embedding Model
+    # ─────────────────────────────────────────────────────────
+    EMBED_BACKEND: str = "torch"   # "torch" or "onnx" (INT8 ONNX Runtime)
+    EMBED_ONNX_FILE: str = "onnx/model_qint8_avx512_vnni.onnx"
+    EMBED_BATCH_SIZE: int = 64
+    EMBED_DEVICE: str = "auto"     # "auto", "cpu", "cuda" (or "cuda:N")
+    EMBED_DTYPE: str = "auto"      # "auto" (FP16 on GPU), "float16", "float32"
     
     # ─────────────────────────────────────────────────────────
     #  🌐 Server Configuration
     # ─────────────────────────────────────────────────────────
-    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
-    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
-    CORS_ORIGINS_STR: str = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000")
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int = 1       # >1 only with VECTOR_STORE_READ_ONLY (each worker has its own store)
+    UVICORN_RELOAD: bool = False   # Dev only, forces a single worker
+    CORS_ORIGINS_STR: str = Field(default="http://localhost:3000,http://127.0.0.1:3000", validation_alias="CORS_ORIGINS")
     
-    @property
-    def CORS_ORIGINS(self) -> List[str]:
-        """Parse CORS origins from comma-separated string"""
-        return [origin.strip() for origin in self.CORS_ORIGINS_STR.split(",")]
+    @cached_property
+    def CORS_ORIGINS(self) -> Tuple[str, ...]:
+        """Parse CORS origins from comma-separated string (once)"""
+        return tuple(origin.strip() for origin in self.CORS_ORIGINS_STR.split(","))
 
     
     # ─────────────────────────────────────────────────────────
     #  📊 Logging & Monitoring
     # ─────────────────────────────────────────────────────────
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    ENABLE_DEBUG_LOGGING: bool = os.getenv("ENABLE_DEBUG_LOGGING", "false").lower() == "true"
-    LOG_API_CALLS: bool = os.getenv("LOG_API_CALLS", "true").lower() == "true"
+    LOG_LEVEL: str = "INFO"
+    ENABLE_DEBUG_LOGGING: bool = False
+    LOG_API_CALLS: bool = True
+    SANITIZE_ALL_LOGS: bool = False  # False: only WARNING+ log records are sanitized
     
-    class Config:
-        env_file = ".env"
-        extra = "ignore"
+    @field_validator("CHUNKING_STRATEGY")
+    @classmethod
+    def _lower_strategy(cls, value: str) -> str:
+        return value.lower()
 
 
 # Global settings instance
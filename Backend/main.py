@@ -13,11 +13,14 @@
 ═══════════════════════════════════════════════════════════════
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from config.settings import settings
 from api.routes import health, documents, chat
+from services.semantic_cache import save_semantic_cache
 from utils.logger import print_banner, print_section, print_success, print_info, setup_logger
 
 logger = setup_logger()
@@ -38,11 +41,25 @@ async def lifespan(app: FastAPI):
     
     print_section("INITIALIZING SERVICES")
     
+    # Parse/chunk process pool first, before torch and the model are loaded
+    from services.document_processor import document_worker, get_parse_pool, shutdown_parse_pool, flush_vector_store
+    get_parse_pool()
+    
     # Initialize vector store
     print_info("Loading Vector Store...")
     from services.vector_store import get_vector_store
     vs = get_vector_store()
-    print_success(f"Vector Store ready ({vs.index.ntotal} vectors)")
+    app.state.vector_store = vs
+    print_success(f"Vector Store ready ({len(vs.chunks)} chunks)")
+    
+    # Load embedding model up front so the first query doesn't pay for it
+    print_info("Loading Embedding Model...")
+    try:
+        from services.embeddings import get_embedding_service
+        app.state.embedding_service = get_embedding_service()
+        print_success("Embedding Model ready")
+    except Exception as e:
+        print_info(f"Embedding Model will load on first request: {e}")
     
     # Check Azure OpenAI connection
     print_info("Testing Azure OpenAI connection...")
@@ -56,10 +73,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print_info(f"Azure OpenAI test skipped: {e}")
     
+    # Initialize chat service (Azure client) eagerly
+    print_info("Initializing Chat Service...")
+    try:
+        from services.chat_service import get_chat_service
+        app.state.chat_service = get_chat_service()
+        print_success("Chat Service ready")
+    except Exception as e:
+        print_info(f"Chat Service will initialize on first request: {e}")
+    
+    # Bounded document processing queue + workers
+    app.state.doc_queue = asyncio.Queue(maxsize=settings.DOC_QUEUE_SIZE)
+    doc_workers = [
+        asyncio.create_task(document_worker(app.state.doc_queue, i + 1))
+        for i in range(settings.DOC_WORKERS)
+    ]
+    print_success(f"Document workers ready ({settings.DOC_WORKERS})")
+    
     print_section("SERVER READY")
     print_success("🌟 Cosmic AI Backend is running!")
-    print_info(f"📡 API: http://localhost:8000")
-    print_info(f"📚 Docs: http://localhost:8000/docs")
+    print_info("📡 API: http://localhost:8000", sanitize=False)
+    print_info("📚 Docs: http://localhost:8000/docs", sanitize=False)
     print_info(f"🔧 CORS: {settings.CORS_ORIGINS}")
     
     yield
@@ -68,6 +102,18 @@ async def lifespan(app: FastAPI):
     # Shutdown
     # ─────────────────────────────────────
     logger.info("\n🌙 Shutting down Cosmic AI...")
+    
+    for worker in doc_workers:
+        worker.cancel()
+    await asyncio.gather(*doc_workers, return_exceptions=True)
+    shutdown_parse_pool()
+    flush_vector_store()
+    
+    chat_service = getattr(app.state, "chat_service", None)
+    if chat_service is not None:
+        await chat_service.aclose()
+    
+    save_semantic_cache()
 
 
 # ─────────────────────────────────────────────────────────────
@@ -78,7 +124,8 @@ app = FastAPI(
     title="🌌 Cosmic AI Backend",
     description="RAG-powered chatbot with document processing",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
@@ -126,10 +173,22 @@ async def root():
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
+    
+    # Every worker loads its own vector store, BM25 index and upload queue;
+    # writers would overwrite each other's files, so only read-only
+    # replicas can share the data directory
+    if settings.WEB_CONCURRENCY > 1 and not settings.VECTOR_STORE_READ_ONLY:
+        sys.exit("❌ WEB_CONCURRENCY > 1 requires VECTOR_STORE_READ_ONLY=true")
+    
+    # uvloop/httptools ship with uvicorn[standard]; uvloop is unavailable on Windows
     uvicorn.run(
         "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=settings.WEB_CONCURRENCY,
+        reload=settings.UVICORN_RELOAD
     )
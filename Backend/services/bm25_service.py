@@ -122,6 +122,25 @@ class BM25Service:
         with open(self.corpus_path, 'w', encoding='utf-8') as f:
             json.dump(corpus_data, f, ensure_ascii=False)
     
+    def remove_file(self, file_id: str):
+        """Drop one file's chunks and rebuild (rolls back a failed upload)"""
+        remaining = [chunk for chunk in self.chunks if chunk.get('file_id') != file_id]
+        if len(remaining) == len(self.chunks):
+            return
+        
+        if remaining:
+            self.build_index(remaining)
+            return
+        
+        # BM25Okapi can't be built over an empty corpus
+        self.bm25 = None
+        self.chunks = []
+        self.tokenized_corpus = []
+        for path in (self.index_path, self.corpus_path):
+            if os.path.exists(path):
+                os.remove(path)
+        logger.info(f"🗑️ BM25 index emptied (removed {file_id})")
+    
     def load_index(self):
         """Load BM25 index from disk"""
         with open(self.index_path, 'rb') as f:
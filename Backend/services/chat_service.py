@@ -4,10 +4,15 @@
 ═══════════════════════════════════════════════════════════════
 """
 
-import json
+import asyncio
+import random
+import sys
 import time
-from typing import List, Dict, Optional, AsyncGenerator
-from openai import AzureOpenAI, APIError, APIConnectionError
+from io import StringIO
+import httpx
+import orjson
+from typing import List, Dict, Optional, Tuple, AsyncGenerator
+from openai import AsyncAzureOpenAI, APIError, APIConnectionError, RateLimitError, InternalServerError
 from config.settings import settings
 from config import agent_config
 from services.vector_store import get_vector_store
@@ -53,6 +58,102 @@ You are Cosmic AI, an intelligent and professional assistant.
 **Important:** Never use your general training knowledge to answer document-specific questions. Only use the provided CONTEXT.
 """
 
+SYSTEM_PROMPT = sys.intern(SYSTEM_PROMPT)
+
+# Shared, never-mutated system message (stable prefix for prompt caching)
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+# User payload section headers
+_RECAP_HDR = "PREVIOUS_RECAP: "
+_HISTORY_HDR = "HISTORY:\n"
+_CONTEXT_HDR = "CONTEXT:\n"
+_QUERY_HDR = "QUERY: "
+_SECTION_SEP = "\n\n"
+
+
+# ─────────────────────────────────────────────────────────────
+#  🧮 Prompt Token Budget
+# ─────────────────────────────────────────────────────────────
+try:
+    import tiktoken
+    _ENC = tiktoken.encoding_for_model("gpt-4o")
+except Exception:
+    # tiktoken missing or its encoding files unavailable offline
+    _ENC = None
+
+
+def _count_tokens(text: str) -> int:
+    """Token count for budgeting (falls back to ~4 chars per token)"""
+    if not text:
+        return 0
+    if _ENC is None:
+        return len(text) // 4 + 1
+    return len(_ENC.encode(text, disallowed_special=()))
+
+
+_SYSTEM_TOKENS = _count_tokens(SYSTEM_PROMPT)
+
+
+def _trim_history(history: List[Dict], token_counts: List[int], budget: int) -> List[Dict]:
+    """Keep the newest messages whose combined tokens fit the budget"""
+    keep = 0
+    for tokens in reversed(token_counts):
+        if tokens > budget:
+            break
+        budget -= tokens
+        keep += 1
+    return history[len(history) - keep:] if keep else []
+
+
+# ─────────────────────────────────────────────────────────────
+#  🚦 Azure OpenAI Concurrency Guard
+# ─────────────────────────────────────────────────────────────
+# Caps in-flight completions per worker; transient errors are retried
+# with exponential backoff instead of failing the request outright.
+_AZURE_SEM = asyncio.Semaphore(settings.AZURE_MAX_CONCURRENCY)
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+def _sse_event(payload: Dict) -> bytes:
+    """Encode a payload as a Server-Sent Event (bytes, sent as-is)"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+_DONE_EVENT = _sse_event({"done": True})
+
+
+class StreamBuffer:
+    """
+    ┌─────────────────────────────────────────────┐
+    │  🌊 Coalesces token deltas for SSE          │
+    │  Flushes on size or time window             │
+    └─────────────────────────────────────────────┘
+    """
+    
+    def __init__(self, max_chars: int, max_interval_ms: int):
+        self.max_chars = max_chars
+        self.max_interval = max_interval_ms / 1000
+        self._parts: List[str] = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+    
+    def append(self, text: str) -> bool:
+        """Buffer a delta; returns True when the buffer is due for a flush"""
+        self._parts.append(text)
+        self._size += len(text)
+        return (
+            self._size >= self.max_chars
+            or time.monotonic() - self._last_flush >= self.max_interval
+        )
+    
+    def flush(self) -> str:
+        """Return buffered text and reset the window"""
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self._last_flush = time.monotonic()
+        return text
+
 
 class ChatService:
     """
@@ -63,68 +164,101 @@ class ChatService:
     """
     
     def __init__(self):
-        self.client = AzureOpenAI(
+        # Pooled HTTP/2 transport: concurrent chats share a few TLS connections
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        self.client = AsyncAzureOpenAI(
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
-            azure_endpoint=settings.AZURE_OPENAI_API_BASE
+            azure_endpoint=settings.AZURE_OPENAI_API_BASE,
+            max_retries=0,  # Retries are handled by _create_completion
+            http_client=self.http_client
         )
         self.deployment = settings.AZURE_OPENAI_DEPLOYMENT_NAME
         
+        # Opt in to prompt caching for the static system prefix (if configured)
+        self._extra_body = (
+            {"prompt_cache_key": settings.AZURE_PROMPT_CACHE_KEY}
+            if settings.AZURE_PROMPT_CACHE_KEY else None
+        )
+        
         logger.info(f"💬 ChatService initialized")
         logger.info(f"   └─ Deployment: {self.deployment}")
     
-    async def stream_chat_response(
+    async def aclose(self):
+        """Close the pooled HTTP connections"""
+        await self.http_client.aclose()
+    
+    async def _create_completion(self, **kwargs):
+        """Call Azure chat completions, backing off exponentially on transient errors"""
+        for attempt in range(settings.AZURE_MAX_RETRIES + 1):
+            try:
+                return await self.client.chat.completions.create(
+                    model=self.deployment,
+                    extra_body=self._extra_body,
+                    **kwargs
+                )
+            except _RETRYABLE_ERRORS as e:
+                if attempt >= settings.AZURE_MAX_RETRIES:
+                    raise
+                wait_time = min(30, 2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"⚠️ Azure OpenAI {type(e).__name__} (attempt {attempt + 1}), retrying in {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+    
+    async def _build_messages(
         self,
         query: str,
         history: List[Dict] = None,
         current_summary: str = "",
         use_rag: bool = True,
-        file_ids: List[str] = None
-    ) -> AsyncGenerator[str, None]:
+        file_ids: List[str] = None,
+        route_metadata: Dict = None,
+        hybrid: bool = True
+    ) -> Tuple[List[Dict], List[Dict]]:
         """
-        ┌─────────────────────────────────────────────┐
-        │  🌊 Stream chat response with RAG           │
-        └─────────────────────────────────────────────┘
+        Run RAG retrieval and assemble the chat messages
+        
+        hybrid=True runs the full pipeline (agent / HyDE / BM25 / graph /
+        rerank, then context compression); hybrid=False is a plain top-K
+        vector search with the chunks formatted as-is.
+        
+        Returns:
+            tuple of (messages, context_chunks)
         """
         
         history = history or []
         context_chunks = []
         
-        logger.info("─" * 60)
-        logger.info(f"💬 Processing query: {query[:50]}...")
-        
         # ─────────────────────────────────────
-        # SMART QUERY ROUTING
+        # Step 1: RAG Retrieval (Threaded to avoid blocking)
         # ─────────────────────────────────────
-        router = get_query_router()
-        route, route_metadata = router.route_query(query)
+        # Started as a task so embedding/search overlaps history formatting
+        rag_task = None
+        if use_rag and hybrid:
+            rag_task = asyncio.create_task(asyncio.to_thread(
+                self._retrieve_rag_context,
+                query=query,
+                file_ids=file_ids,
+                route_metadata=route_metadata
+            ))
+        elif use_rag:
+            rag_task = asyncio.create_task(asyncio.to_thread(
+                self._vector_search,
+                query,
+                top_k=settings.TOP_K_RESULTS,
+                file_ids=file_ids
+            ))
         
-        # Check if we can skip RAG entirely
-        if route_metadata.get('skip_rag', False):
-            logger.info(f"⚡ Skipping RAG - Route: {route}")
-            
-            # Generate quick response
-            quick_response = router.format_quick_response(route, query)
-            if quick_response:
-                # Stream the quick response
-                yield f"data: {json.dumps({'content': quick_response})}\\n\\n"
-                yield f"data: {json.dumps({'done': True})}\\n\\n"
-                logger.info(f"✅ Quick response sent (no RAG needed)")
-                return
+        # Count recent history tokens (last 10 messages) while retrieval runs
+        recent_history = history[-10:]
+        history_tokens = [_count_tokens(m.get('content', '')) for m in recent_history]
         
-        # ─────────────────────────────────────
-        # RAG Retrieval (Threaded to avoid blocking)
-        # ─────────────────────────────────────
-        if use_rag:
+        if rag_task is not None:
             try:
-                # Run heavy retrieval in a separate thread
-                import asyncio
-                context_chunks = await asyncio.to_thread(
-                    self._retrieve_rag_context,
-                    query=query,
-                    file_ids=file_ids,
-                    route_metadata=route_metadata
-                )
+                context_chunks = await rag_task
             except Exception as e:
                 logger.error(f"❌ RAG retrieval error in thread: {e}")
                 
@@ -132,13 +266,9 @@ class ChatService:
         # Step 2: Context Compression (Local LLM)
         # ─────────────────────────────────────
         context_text = ""
-        if context_chunks:
-            # Save to cache if new
-            if use_rag:
-                # We can't easily check 'cached_context' here since we moved logic
-                # But we can cache the result
-                pass 
-                
+        if context_chunks and not hybrid:
+            context_text = ToonFormatter.format_full_context(context_chunks)
+        elif context_chunks:
             try:
                 compressor = get_context_compressor()
                 # Returns compressed text OR full formatted text if compression disabled
@@ -148,37 +278,104 @@ class ChatService:
                 context_text = ToonFormatter.format_full_context(context_chunks)
 
         # ─────────────────────────────────────
-        # Step 3: Prepare Messages
+        # Step 3: Fit History Into Token Budget
         # ─────────────────────────────────────
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        history_text = ""
+        if recent_history:
+            budget = (
+                settings.GPT_MAX_CONTEXT_TOKENS
+                - settings.GPT_RESERVED_TOKENS
+                - _SYSTEM_TOKENS
+                - _count_tokens(current_summary)
+                - _count_tokens(context_text)
+                - _count_tokens(query)
+            )
+            kept_history = _trim_history(recent_history, history_tokens, budget)
+            if len(kept_history) < len(recent_history):
+                logger.info(f"✂️ History trimmed to {len(kept_history)}/{len(recent_history)} messages for token budget")
+            history_text = ToonFormatter.format_history(kept_history)
         
-        # Add Long-Term Memory (Recap) if available
-        if current_summary:
-            messages.append({
-                "role": "system",
-                "content": f"PREVIOUS_RECAP: {current_summary}"
-            })
+        # ─────────────────────────────────────
+        # Step 4: Prepare Messages
+        # ─────────────────────────────────────
+        messages = [_SYSTEM_MSG]
         
         # Build input payload (Combined for token efficiency)
-        input_parts = []
+        # Written straight into one buffer to avoid per-section copies
+        buf = StringIO()
         
-        # Add recent history (last 10 messages)
-        if history:
-            recent_history = history[-10:]
-            history_text = ToonFormatter.format_history(recent_history)
-            if history_text:
-                input_parts.append(f"HISTORY:\n{history_text}")
+        # Add Long-Term Memory (Recap) if available; kept out of the
+        # system message so that stays byte-identical across sessions
+        if current_summary:
+            buf.write(_RECAP_HDR)
+            buf.write(current_summary)
+            buf.write(_SECTION_SEP)
+        
+        # Add recent history
+        if history_text:
+            buf.write(_HISTORY_HDR)
+            buf.write(history_text)
+            buf.write(_SECTION_SEP)
         
         # Add RAG context
         if context_text:
-            input_parts.append(f"CONTEXT:\n{context_text}")
+            buf.write(_CONTEXT_HDR)
+            buf.write(context_text)
+            buf.write(_SECTION_SEP)
         
         # Add the query
-        input_parts.append(f"QUERY: {query}")
+        buf.write(_QUERY_HDR)
+        buf.write(query)
         
         # Combine into single user message
-        user_content = "\n\n".join(input_parts)
-        messages.append({"role": "user", "content": user_content})
+        messages.append({"role": "user", "content": buf.getvalue()})
+        
+        return messages, context_chunks
+    
+    async def stream_chat_response(
+        self,
+        query: str,
+        history: List[Dict] = None,
+        current_summary: str = "",
+        use_rag: bool = True,
+        file_ids: List[str] = None
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        ┌─────────────────────────────────────────────┐
+        │  🌊 Stream chat response with RAG           │
+        └─────────────────────────────────────────────┘
+        """
+        
+        logger.info("─" * 60)
+        logger.info(f"💬 Processing query: {query[:50]}...")
+        
+        # ─────────────────────────────────────
+        # SMART QUERY ROUTING
+        # ─────────────────────────────────────
+        router = get_query_router()
+        route, route_metadata = router.route_query(query)
+        
+        # Check if we can skip RAG entirely
+        if route_metadata.get('skip_rag', False):
+            logger.info(f"⚡ Skipping RAG - Route: {route}")
+            
+            # Generate quick response
+            quick_response = router.format_quick_response(route, query)
+            if quick_response:
+                # Stream the quick response
+                yield _sse_event({"content": quick_response})
+                yield _DONE_EVENT
+                logger.info(f"✅ Quick response sent (no RAG needed)")
+                return
+        
+        messages, _ = await self._build_messages(
+            query=query,
+            history=history,
+            current_summary=current_summary,
+            use_rag=use_rag,
+            file_ids=file_ids,
+            route_metadata=route_metadata
+        )
         
         logger.info(f"📤 Sending to Azure OpenAI...")
         logger.info(f"   └─ Messages: {len(messages)}")
@@ -187,38 +384,47 @@ class ChatService:
         # Step 4: Stream Response
         # ─────────────────────────────────────
         try:
-            stream = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=messages,
-                stream=True,
-                temperature=settings.GPT_TEMPERATURE,
-                max_tokens=settings.GPT_MAX_COMPLETION_TOKENS,
-                top_p=settings.GPT_TOP_P,
-                frequency_penalty=settings.GPT_FREQUENCY_PENALTY,
-                presence_penalty=settings.GPT_PRESENCE_PENALTY
-            )
-
-            
-            full_response = ""
-            
-            for chunk in stream:
-                if chunk.choices and len(chunk.choices) > 0:
-                    delta = chunk.choices[0].delta
-                    if delta and delta.content:
-                        content = delta.content
-                        full_response += content
-                        
-                        # Yield SSE formatted data
-                        yield f"data: {json.dumps({'content': content})}\n\n"
+            async with _AZURE_SEM:
+                stream = await self._create_completion(
+                    messages=messages,
+                    stream=True,
+                    temperature=settings.GPT_TEMPERATURE,
+                    max_tokens=settings.GPT_MAX_COMPLETION_TOKENS,
+                    top_p=settings.GPT_TOP_P,
+                    frequency_penalty=settings.GPT_FREQUENCY_PENALTY,
+                    presence_penalty=settings.GPT_PRESENCE_PENALTY
+                )
+                
+                full_response = ""
+                buffer = StreamBuffer(
+                    max_chars=settings.GPT_STREAM_FLUSH_CHARS,
+                    max_interval_ms=settings.GPT_STREAM_FLUSH_INTERVAL_MS
+                )
+                
+                async for chunk in stream:
+                    if chunk.choices and len(chunk.choices) > 0:
+                        delta = chunk.choices[0].delta
+                        if delta and delta.content:
+                            content = delta.content
+                            full_response += content
+                            
+                            # Yield SSE formatted data once the buffer window is full
+                            if buffer.append(content):
+                                yield _sse_event({"content": buffer.flush()})
+                
+                # Flush whatever is left in the buffer
+                remaining = buffer.flush()
+                if remaining:
+                    yield _sse_event({"content": remaining})
             
             # Send completion signal
-            yield f"data: {json.dumps({'done': True})}\n\n"
+            yield _DONE_EVENT
             
             logger.info(f"✅ Response completed: {len(full_response)} chars")
             
         except Exception as e:
             logger.error(f"❌ Streaming error: {e}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield _sse_event({"error": str(e)})
     
     def _retrieve_rag_context(self, query: str, file_ids: List[str], route_metadata: Dict = None) -> List[Dict]:
         """Synchronous method for heavy RAG retrieval"""
@@ -313,15 +519,12 @@ class ChatService:
         logger.info("🔍 Ultimate Hybrid Retrieval Pipeline Starting...")
         
         try:
-            embedding_service = get_embedding_service()
-            vector_store = get_vector_store()
             bm25_service = get_bm25_service()
             hybrid_retriever = get_hybrid_retriever()
             reranker = get_reranker_service()
             
             # 1A. Vector
-            query_embedding = embedding_service.embed_query(search_query)
-            vector_results = vector_store.search(query_embedding, top_k=10, file_ids=file_ids)
+            vector_results = self._vector_search(search_query, top_k=10, file_ids=file_ids)
             vector_results_formatted = [
                 ({
                     "id": f"vector_{i}",
@@ -377,6 +580,11 @@ class ChatService:
             
         return []
 
+    def _vector_search(self, text: str, top_k: int, file_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Embed and search (embeddings and results are cached by their services)"""
+        query_embedding = get_embedding_service().embed_query(text)
+        return get_vector_store().search(query_embedding, top_k=top_k, file_ids=file_ids)
+
     async def get_chat_response(
         self,
         query: str,
@@ -388,56 +596,26 @@ class ChatService:
         Get non-streaming chat response
         """
         
-        history = history or []
-        context_chunks = []
-        
-        # RAG Retrieval
-        if use_rag:
-            try:
-                embedding_service = get_embedding_service()
-                vector_store = get_vector_store()
-                
-                query_embedding = embedding_service.embed_query(query)
-                context_chunks = vector_store.search(
-                    query_embedding,
-                    top_k=settings.TOP_K_RESULTS,
-                    file_ids=file_ids
-                )
-            except Exception as e:
-                logger.error(f"❌ RAG retrieval error: {e}")
-        
-        # Prepare messages
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        
-        # Add context
-        input_parts = []
-        
-        if history:
-            recent_history = history[-10:]
-            history_text = ToonFormatter.format_history(recent_history)
-            if history_text:
-                input_parts.append(f"HISTORY:\n{history_text}")
-        
-        if context_chunks:
-            context_text = ToonFormatter.format_full_context(context_chunks)
-            input_parts.append(f"CONTEXT:\n{context_text}")
-        
-        input_parts.append(f"QUERY: {query}")
-        
-        user_content = "\n\n".join(input_parts)
-        messages.append({"role": "user", "content": user_content})
+        # Plain top-K retrieval, as this endpoint has always used
+        messages, context_chunks = await self._build_messages(
+            query=query,
+            history=history,
+            use_rag=use_rag,
+            file_ids=file_ids,
+            hybrid=False
+        )
         
         # Get response
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=messages,
-                temperature=settings.GPT_TEMPERATURE,
-                max_tokens=settings.GPT_MAX_COMPLETION_TOKENS,
-                top_p=settings.GPT_TOP_P,
-                frequency_penalty=settings.GPT_FREQUENCY_PENALTY,
-                presence_penalty=settings.GPT_PRESENCE_PENALTY
-            )
+            async with _AZURE_SEM:
+                response = await self._create_completion(
+                    messages=messages,
+                    temperature=settings.GPT_TEMPERATURE,
+                    max_tokens=settings.GPT_MAX_COMPLETION_TOKENS,
+                    top_p=settings.GPT_TOP_P,
+                    frequency_penalty=settings.GPT_FREQUENCY_PENALTY,
+                    presence_penalty=settings.GPT_PRESENCE_PENALTY
+                )
 
             
             return {
@@ -4,13 +4,18 @@
 ═══════════════════════════════════════════════════════════════
 """
 
+import asyncio
 import json
 import time
-from typing import List, Dict, Optional, AsyncGenerator
-from openai import AzureOpenAI, APIError, APIConnectionError
+from typing import List, Dict, Optional, Tuple, AsyncGenerator
+import numpy as np
+from openai import AsyncAzureOpenAI, APIError, APIConnectionError
 from config.settings import settings
+from config import cache_config
 from services.vector_store import get_vector_store
 from services.embeddings import get_embedding_service
+from services.semantic_cache import get_semantic_cache
+from services.chat_service import StreamBuffer
 from services.toon_formatter import ToonFormatter
 from services.response_formatter import ResponseFormatter
 from utils.logger import setup_logger
@@ -43,6 +48,28 @@ You are Cosmic AI, an intelligent and professional assistant.
 **Important:** Never use your general training knowledge to answer document-specific questions. Only use the provided CONTEXT.
 """
 
+# Shared, never-mutated system message (stable prefix for prompt caching)
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def _sse_event(payload: Dict) -> str:
+    """Encode a payload as a Server-Sent Event"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _replay_chunks(text: str, size: int) -> List[str]:
+    """Split a cached answer into word-aligned pieces of roughly `size` chars"""
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            space = text.find(' ', end)
+            end = len(text) if space == -1 else space + 1
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
 
 class ChatService:
     """
@@ -53,7 +80,8 @@ class ChatService:
     """
     
     def __init__(self):
-        self.client = AzureOpenAI(
+        # Async client: token reads yield to the event loop between chunks
+        self.client = AsyncAzureOpenAI(
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
             azure_endpoint=settings.AZURE_OPENAI_API_BASE
@@ -63,6 +91,34 @@ class ChatService:
         logger.info(f"💬 ChatService initialized")
         logger.info(f"   └─ Deployment: {self.deployment}")
     
+    def _probe_semantic_cache(
+        self,
+        query: str,
+        current_summary: str,
+        file_ids: Optional[List[str]]
+    ) -> Tuple[Optional[Dict], Optional[np.ndarray], np.ndarray, Tuple, str]:
+        """
+        Embed the query once and look it up in the semantic cache
+        
+        Returns:
+            tuple of (cached entry, query embedding, lookup vector, scope, corpus generation)
+        """
+        embedding_service = get_embedding_service()
+        query_embedding = embedding_service.embed_query(query)
+        
+        # Blend in the session recap so the same words in a different
+        # conversation don't collide
+        lookup_vector = query_embedding
+        if current_summary:
+            weight = cache_config.SEMANTIC_CACHE_RECAP_WEIGHT
+            recap_embedding = embedding_service.embed_query(current_summary)
+            lookup_vector = (1 - weight) * query_embedding + weight * recap_embedding
+        
+        scope = tuple(sorted(file_ids)) if file_ids else ()
+        generation = get_vector_store().generation
+        cached = get_semantic_cache().lookup(lookup_vector, scope, generation)
+        return cached, query_embedding, lookup_vector, scope, generation
+    
     async def stream_chat_response(
         self,
         query: str,
@@ -106,10 +162,34 @@ class ChatService:
         # Handle non-RAG routes immediately
         if not router.should_use_rag(route_type):
             quick_response = router.format_quick_response(route_type, query)
-            yield f"data: {json.dumps({'content': quick_response})}\\n\\n"
-            yield f"data: {json.dumps({'done': True, 'response_time_ms': 0, 'chunks_used': 0})}\\n\\n"
+            yield _sse_event({'content': quick_response})
+            yield _sse_event({'done': True, 'response_time_ms': 0, 'chunks_used': 0})
             return
 
+        # Semantic cache: replay a stored answer to an equivalent question.
+        # Follow-ups ("tell me more") depend on the conversation, which is
+        # not part of the cache key, so only history-free turns use it.
+        query_embedding = None
+        cache_key = None
+        if use_rag and not history and get_semantic_cache().enabled:
+            try:
+                cached, query_embedding, *cache_key = self._probe_semantic_cache(
+                    query, current_summary, file_ids
+                )
+                if cached:
+                    for piece in _replay_chunks(cached["response"], cache_config.SEMANTIC_CACHE_REPLAY_CHARS):
+                        yield _sse_event({'content': piece})
+                    yield _sse_event({
+                        'done': True,
+                        'chunks_used': cached["chunks_used"],
+                        'response_time_ms': 0,
+                        'model': cached["model"],
+                        'cached': True
+                    })
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ Semantic cache lookup failed: {e}")
+
         # 2. Analyze Intent & Get Initial Weights
         analysis_result = transform_service.analyze_query(query)
         search_weights = analysis_result['weights']
@@ -136,8 +216,10 @@ class ChatService:
                 vector_store = get_vector_store()
                 
                 # Use HyDE doc for vector search if available, else original query
-                search_text = hyde_doc if hyde_doc else query
-                query_embedding = embedding_service.embed_query(search_text)
+                # (reuse the embedding from the cache probe when searching the raw query)
+                if hyde_doc or query_embedding is None:
+                    search_text = hyde_doc if hyde_doc else query
+                    query_embedding = embedding_service.embed_query(search_text)
                 
                 vector_results = vector_store.search(
                     query_embedding,
@@ -182,35 +264,33 @@ class ChatService:
         # ─────────────────────────────────────
         # Step 2: Prepare Messages
         # ─────────────────────────────────────
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        
-        # Add Long-Term Memory (Recap) if available
-        if current_summary:
-            messages.append({
-                "role": "system",
-                "content": f"PREVIOUS_RECAP: {current_summary}"
-            })
+        # System message stays byte-identical across calls (prompt caching)
+        messages = [_SYSTEM_MSG]
         
         # Build input payload (Combined for token efficiency)
         input_parts = []
         
+        # Add Long-Term Memory (Recap) if available
+        if current_summary:
+            input_parts.append(f"PREVIOUS_RECAP: {current_summary}")
+        
         # Add recent history (last 10 messages)
         if history:
             recent_history = history[-10:]
             history_text = ToonFormatter.format_history(recent_history)
             if history_text:
-                input_parts.append(f"HISTORY:\\n{history_text}")
+                input_parts.append(f"HISTORY:\n{history_text}")
         
         # Add RAG context
         if context_chunks:
             context_text = ToonFormatter.format_full_context(context_chunks)
-            input_parts.append(f"CONTEXT:\\n{context_text}")
+            input_parts.append(f"CONTEXT:\n{context_text}")
         
         # Add the query
         input_parts.append(f"QUERY: {query}")
         
         # Combine into single user message
-        user_content = "\\n\\n".join(input_parts)
+        user_content = "\n\n".join(input_parts)
         messages.append({"role": "user", "content": user_content})
         
         logger.info(f"📤 Sending to Azure OpenAI...")
@@ -225,7 +305,7 @@ class ChatService:
         
         while retry_count < max_retries:
             try:
-                stream = self.client.chat.completions.create(
+                stream = await self.client.chat.completions.create(
                     model=self.deployment,
                     messages=messages,
                     stream=True,
@@ -238,8 +318,12 @@ class ChatService:
 
                 full_response = ""
                 chunk_count = 0
+                buffer = StreamBuffer(
+                    max_chars=settings.GPT_STREAM_FLUSH_CHARS,
+                    max_interval_ms=settings.GPT_STREAM_FLUSH_INTERVAL_MS
+                )
                 
-                for chunk in stream:
+                async for chunk in stream:
                     if chunk.choices and len(chunk.choices) > 0:
                         delta = chunk.choices[0].delta
                         if delta and delta.content:
@@ -247,8 +331,14 @@ class ChatService:
                             full_response += content
                             chunk_count += 1
                             
-                            # Yield SSE formatted data
-                            yield f"data: {json.dumps({'content': content})}\\n\\n"
+                            # Yield SSE formatted data once the buffer window is full
+                            if buffer.append(content):
+                                yield _sse_event({'content': buffer.flush()})
+                
+                # Flush whatever is left in the buffer
+                remaining = buffer.flush()
+                if remaining:
+                    yield _sse_event({'content': remaining})
                 
                 # Calculate response time
                 response_time_ms = int((time.time() - start_time) * 1000)
@@ -260,13 +350,20 @@ class ChatService:
                     'response_time_ms': response_time_ms,
                     'model': self.deployment
                 }
-                yield f"data: {json.dumps(metadata)}\\n\\n"
+                yield _sse_event(metadata)
                 
                 logger.info(f"✅ Response completed:")
                 logger.info(f"   └─ Length: {len(full_response)} chars")
                 logger.info(f"   └─ Time: {response_time_ms}ms")
                 logger.info(f"   └─ Chunks: {chunk_count}")
                 
+                if cache_key:
+                    lookup_vector, scope, generation = cache_key
+                    get_semantic_cache().insert(
+                        lookup_vector, scope, generation,
+                        full_response, len(context_chunks), self.deployment
+                    )
+                
                 break  # Success, exit retry loop
                 
             except APIConnectionError as e:
@@ -277,26 +374,26 @@ class ChatService:
                     # Wait before retry (exponential backoff)
                     wait_time = 2 ** retry_count
                     logger.info(f"   └─ Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                 else:
                     # Max retries reached
                     error_msg = "Connection to Azure OpenAI failed. Please check your network and try again."
                     formatted_error = ResponseFormatter.format_error_response(error_msg, query)
-                    yield f"data: {json.dumps({'error': error_msg, 'formatted_error': formatted_error})}\\n\\n"
+                    yield _sse_event({'error': error_msg, 'formatted_error': formatted_error})
                     logger.error(f"❌ Max retries reached for connection error")
                     
             except APIError as e:
                 logger.error(f"❌ Azure API error (truncated)")
                 error_msg = f"Azure OpenAI API error: {str(e)[:100]}"
                 formatted_error = ResponseFormatter.format_error_response(error_msg, query)
-                yield f"data: {json.dumps({'error': error_msg, 'formatted_error': formatted_error})}\\n\\n"
+                yield _sse_event({'error': error_msg, 'formatted_error': formatted_error})
                 break
                 
             except Exception as e:
                 logger.error(f"❌ Unexpected streaming error")
                 error_msg = f"An unexpected error occurred"
                 formatted_error = ResponseFormatter.format_error_response(error_msg, query)
-                yield f"data: {json.dumps({'error': error_msg, 'formatted_error': formatted_error})}\\n\\n"
+                yield _sse_event({'error': error_msg, 'formatted_error': formatted_error})
                 break
     
     async def get_chat_response(
@@ -326,6 +423,20 @@ class ChatService:
                 "model": "rule-based"
             }
 
+        # Semantic cache (history-free turns only, see stream_chat_response)
+        cache_key = None
+        if use_rag and not history and get_semantic_cache().enabled:
+            try:
+                cached, _, *cache_key = self._probe_semantic_cache(query, "", file_ids)
+                if cached:
+                    return {
+                        "response": cached["response"],
+                        "retrieved_chunks": [],
+                        "model": cached["model"]
+                    }
+            except Exception as e:
+                logger.warning(f"⚠️ Semantic cache lookup failed: {e}")
+
         # 2. RAG Retrieval (Hybrid)
         if use_rag:
             try:
@@ -382,7 +493,7 @@ class ChatService:
                     context_chunks = []
         
         # Prepare messages
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        messages = [_SYSTEM_MSG]
         
         # Add context (Formatted)
         input_parts = []
@@ -391,20 +502,20 @@ class ChatService:
             recent_history = history[-10:]
             history_text = ToonFormatter.format_history(recent_history)
             if history_text:
-                input_parts.append(f"HISTORY:\\n{history_text}")
+                input_parts.append(f"HISTORY:\n{history_text}")
         
         if context_chunks:
             context_text = ToonFormatter.format_full_context(context_chunks)
-            input_parts.append(f"CONTEXT:\\n{context_text}")
+            input_parts.append(f"CONTEXT:\n{context_text}")
         
         input_parts.append(f"QUERY: {query}")
         
-        user_content = "\\n\\n".join(input_parts)
+        user_content = "\n\n".join(input_parts)
         messages.append({"role": "user", "content": user_content})
         
         # Get response
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.deployment,
                 messages=messages,
                 temperature=settings.GPT_TEMPERATURE,
@@ -414,9 +525,23 @@ class ChatService:
                 presence_penalty=settings.GPT_PRESENCE_PENALTY
             )
 
+            answer = response.choices[0].message.content
+            
+            # Verify prompt cache hits on the shared prefix
+            usage = getattr(response, "usage", None)
+            details = getattr(usage, "prompt_tokens_details", None)
+            if details is not None:
+                logger.info(f"   └─ Cached prompt tokens: {getattr(details, 'cached_tokens', 0)}/{usage.prompt_tokens}")
+            
+            if cache_key:
+                lookup_vector, scope, generation = cache_key
+                get_semantic_cache().insert(
+                    lookup_vector, scope, generation,
+                    answer, len(context_chunks), self.deployment
+                )
             
             return {
-                "response": response.choices[0].message.content,
+                "response": answer,
                 "retrieved_chunks": context_chunks,
                 "model": self.deployment
             }
@@ -5,11 +5,14 @@
 """
 
 import json
+import logging
 import re
-from typing import List, Dict
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Optional
 from openai import AzureOpenAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from config.settings import settings
+from config import embedding_config
 from utils.logger import setup_logger
 
 logger = setup_logger()
@@ -21,40 +24,159 @@ class RecursiveTextChunker:
     │  ✂️ Recursive text chunking                 │
     │  Preserves semantic boundaries              │
     └─────────────────────────────────────────────┘
+    
+    Single regex pass collects separator offsets; each chunk then ends
+    at the strongest separator that fits (paragraph > line > sentence >
+    clause > word), falling back to a hard cut. Window sizes are counted
+    in embedding-model tokens, capped at what the encoder can see.
     """
     
+    # Strongest first; alternation order makes "\n\n" win over "\n"
+    SEPARATORS = ["\n\n", "\n", ". ", ", ", " "]
+    
+    _SEP_RE = re.compile("|".join(re.escape(sep) for sep in SEPARATORS))
+    _WS_RE = re.compile(r"\s+")
+    
     def __init__(self):
-        # Approximate tokens per character (rough estimate)
-        chunk_size_chars = settings.CHUNK_SIZE * 4
-        chunk_overlap_chars = settings.CHUNK_OVERLAP * 4
-        
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size_chars,
-            chunk_overlap=chunk_overlap_chars,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", ", ", " ", ""],
-            keep_separator=True
-        )
+        # Chunks longer than the encoder window would be silently truncated
+        max_tokens = embedding_config.MAX_SEQ_LENGTH - 2  # [CLS] / [SEP]
+        self.chunk_size_tokens = min(settings.CHUNK_SIZE, max_tokens)
+        
+        # Overlap and minimum shrink with the size so their ratios hold
+        scale = self.chunk_size_tokens / settings.CHUNK_SIZE
+        self.chunk_overlap_tokens = min(int(settings.CHUNK_OVERLAP * scale), self.chunk_size_tokens // 2)
+        self.min_chunk_tokens = int(settings.MIN_CHUNK_SIZE * scale)
+        
+        # Split in the embedding model's own token space; loaded on first use
+        self.tokenizer = None
+        self._tokenizer_loaded = False
+        
+        # Approximate tokens per character (fallback estimate)
+        self.chunk_size_chars = self.chunk_size_tokens * 4
+        self.chunk_overlap_chars = self.chunk_overlap_tokens * 4
+        self.min_chunk_chars = self.min_chunk_tokens * 4
+        self._rank = {sep: rank for rank, sep in enumerate(self.SEPARATORS)}
         
         logger.info(f"✂️ RecursiveTextChunker initialized")
+        if self.chunk_size_tokens < settings.CHUNK_SIZE:
+            logger.info(
+                f"   └─ CHUNK_SIZE capped to {self.chunk_size_tokens} tokens (encoder limit), "
+                f"overlap {self.chunk_overlap_tokens}, min {self.min_chunk_tokens}"
+            )
+    
+    def _load_tokenizer(self):
+        """Import transformers and load the tokenizer (once per process)"""
+        self._tokenizer_loaded = True
+        try:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(
+                f"sentence-transformers/{embedding_config.MODEL_NAME}"
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Tokenizer unavailable, falling back to ~4 chars per token: {e}")
+    
+    def _token_starts(self, text: str) -> Optional[List[int]]:
+        """Character offset where each token begins (None without a tokenizer)"""
+        if not self._tokenizer_loaded:
+            self._load_tokenizer()
+        if self.tokenizer is None:
+            return None
+        offsets = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False
+        )["offset_mapping"]
+        return [start for start, _ in offsets]
+    
+    def _split(self, text: str) -> List[str]:
+        """Split text into overlapping windows ending on separator boundaries,
+        dropping windows under the minimum size"""
+        # End offsets of every separator, per strength and combined
+        ends_by_rank = [[] for _ in self.SEPARATORS]
+        all_ends = []
+        for match in self._SEP_RE.finditer(text):
+            ends_by_rank[self._rank[match.group()]].append(match.end())
+            all_ends.append(match.end())
+        
+        token_starts = self._token_starts(text)
+        if token_starts is None:
+            size = self.chunk_size_chars
+            overlap = self.chunk_overlap_chars
+            min_size = self.min_chunk_chars
+        else:
+            size = self.chunk_size_tokens
+            overlap = self.chunk_overlap_tokens
+            min_size = self.min_chunk_tokens
+        
+        skipped = 0
+        
+        def keep(start: int, end: int) -> bool:
+            nonlocal skipped
+            if token_starts is None:
+                length = end - start
+            else:
+                length = bisect_left(token_starts, end) - bisect_left(token_starts, start)
+            if length < min_size:
+                skipped += 1
+                return False
+            return True
+        
+        n = len(text)
+        chunks = []
+        pos = 0
+        
+        while pos < n:
+            # Window end: `size` chars, or where token number `size` begins
+            if token_starts is None:
+                limit = pos + size
+            else:
+                t = bisect_left(token_starts, pos) + size
+                limit = token_starts[t] if t < len(token_starts) else n
+            if limit >= n:
+                if keep(pos, n):
+                    chunks.append(text[pos:])
+                break
+            
+            # Last boundary within the window, strongest separator first
+            cut = limit
+            for ends in ends_by_rank:
+                i = bisect_right(ends, limit) - 1
+                if i >= 0 and ends[i] > pos:
+                    cut = ends[i]
+                    break
+            if keep(pos, cut):
+                chunks.append(text[pos:cut])
+            
+            # Step back by the overlap, starting on a boundary
+            next_pos = cut
+            if overlap:
+                if token_starts is None:
+                    back = cut - overlap
+                else:
+                    back = token_starts[max(bisect_left(token_starts, cut) - overlap, 0)]
+                i = bisect_left(all_ends, back)
+                if i < len(all_ends) and pos < all_ends[i] < cut:
+                    next_pos = all_ends[i]
+            pos = next_pos
+        
+        if skipped:
+            unit = "chars" if token_starts is None else "tokens"
+            logger.info(f"   └─ Skipped {skipped} chunks under {min_size} {unit}")
+        return chunks
     
     def chunk_text(self, text: str) -> List[str]:
         if not text or not text.strip():
             return []
         
         logger.info(f"✂️ Recursive chunking: {len(text)} chars")
-        chunks = self.splitter.split_text(text)
+        chunks = self._split(text)
         
-        # Post-process
-        processed_chunks = []
-        min_chunk_chars = settings.MIN_CHUNK_SIZE * 4
+        # Post-process: collapse whitespace (tiny chunks were already
+        # dropped by token count, which whitespace doesn't affect)
+        ws_sub = self._WS_RE.sub
+        processed_chunks = [c for c in (ws_sub(" ", c).strip() for c in chunks) if c]
         
-        for chunk in chunks:
-            chunk = " ".join(chunk.split())
-            if len(chunk) < min_chunk_chars:
-                continue
-            processed_chunks.append(chunk)
-            
         return processed_chunks
 
 
@@ -168,7 +290,8 @@ class AgenticTextChunker:
                     # Validate indices are within this batch's range
                     valid_indices = [idx for idx in indices if i <= idx < i + window_size]
                     breakpoints.update(valid_indices)
-                    logger.info(f"      └─ Batch {i}-{i+window_size}: Found breaks at {valid_indices}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"      └─ Batch {i}-{i+window_size}: Found breaks at {valid_indices}")
                 
             except Exception as e:
                 logger.error(f"⚠️ Agentic chunking error on batch {i}: {e}")
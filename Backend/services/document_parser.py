@@ -5,6 +5,8 @@
 """
 
 import os
+import logging
+import mmap
 from typing import Optional
 from config.settings import settings
 import io
@@ -12,7 +14,6 @@ from utils.logger import setup_logger
 
 logger = setup_logger()
 
-
 class DocumentParser:
     """
     ┌─────────────────────────────────────────────┐
@@ -50,13 +51,21 @@ class DocumentParser:
     @staticmethod
     def _parse_text(file_path: str) -> str:
         """Parse plain text file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_path, 'r', encoding='latin-1') as f:
-                content = f.read()
+        if os.path.getsize(file_path) == 0:
+            return ""
+        
+        # Decode straight from the mapped pages (no intermediate bytes copy)
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                try:
+                    content = str(mm, 'utf-8')
+                except UnicodeDecodeError:
+                    # Try with different encoding
+                    content = str(mm, 'latin-1')
+        
+        # Same newline translation text-mode reads used to apply
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
         
         logger.info(f"   └─ Extracted: {len(content)} characters")
         return content
@@ -65,60 +74,69 @@ class DocumentParser:
     def _parse_pdf(file_path: str) -> str:
         """Parse PDF file"""
         try:
-            from PyPDF2 import PdfReader
+            import pymupdf
             
-            reader = PdfReader(file_path)
             text_parts = []
+            pages_with_text = 0
             
-            logger.info(f"   └─ Pages found: {len(reader.pages)}")
-            
-            for page_num, page in enumerate(reader.pages):
-                text = page.extract_text()
-                if text and text.strip():
-                    text_parts.append(text)
-                    logger.info(f"      └─ Page {page_num + 1}: {len(text)} chars")
+            # MuPDF extracts text natively
+            with pymupdf.open(file_path) as doc:
+                logger.info(f"   └─ Pages found: {doc.page_count}")
                 
-                # 🖼️ MULTIMODAL EXTRACTION
-                if settings.ENABLE_MULTIMODAL:
-                    try:
-                        # Try to import dependencies locally to avoid crash if missing
-                        import ollama
-                        from PIL import Image
-                        
-                        if hasattr(page, 'images') and page.images:
-                            logger.info(f"      └─ Found {len(page.images)} images on page {page_num + 1}")
+                # Pages are read serially: the parse pool already spreads
+                # documents over the cores
+                for page_num, page in enumerate(doc):
+                    text = page.get_text("text")
+                    if text and text.strip():
+                        text_parts.append(text)
+                        pages_with_text += 1
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"      └─ Page {page_num + 1}: {len(text)} chars")
+                    
+                    # 🖼️ MULTIMODAL EXTRACTION
+                    if settings.ENABLE_MULTIMODAL:
+                        try:
+                            # Try to import dependencies locally to avoid crash if missing
+                            import ollama
+                            from PIL import Image
                             
-                            for img_obj in page.images:
-                                try:
-                                    # Convert bytes to PIL Image (validation)
-                                    image_bytes = img_obj.data
-                                    
-                                    # Call Ollama Vision (Llama 3.2 Vision)
-                                    # Note: This adds latency but enriches content significantly
-                                    response = ollama.chat(
-                                        model=settings.OLLAMA_VISION_MODEL,
-                                        messages=[{
-                                            'role': 'user',
-                                            'content': 'Describe this image in detail. If it is a chart or graph, summarize the data points and trends. If it is a diagram, explain the flow.',
-                                            'images': [image_bytes]
-                                        }]
-                                    )
-                                    
-                                    description = response['message']['content']
-                                    desc_marker = f"\n\n[IMAGE DESCRIPTION: {description}]\n\n"
-                                    text_parts.append(desc_marker)
-                                    logger.info(f"         └─ Generated description: {description[:50]}...")
-                                    
-                                except Exception as img_err:
-                                    logger.warning(f"         ⚠️ Failed to process image: {img_err}")
-                                    
-                    except ImportError:
-                        logger.warning("      ⚠️ Multimodal dependencies (ollama, pillow) missing. Skipping images.")
-                    except Exception as mm_err:
-                        logger.warning(f"      ⚠️ Multimodal processing error: {mm_err}")
+                            images = page.get_images(full=True)
+                            if images:
+                                if logger.isEnabledFor(logging.DEBUG):
+                                    logger.debug(f"      └─ Found {len(images)} images on page {page_num + 1}")
+                                
+                                for img in images:
+                                    try:
+                                        # Raw image bytes by xref
+                                        image_bytes = doc.extract_image(img[0])["image"]
+                                        
+                                        # Call Ollama Vision (Llama 3.2 Vision)
+                                        # Note: This adds latency but enriches content significantly
+                                        response = ollama.chat(
+                                            model=settings.OLLAMA_VISION_MODEL,
+                                            messages=[{
+                                                'role': 'user',
+                                                'content': 'Describe this image in detail. If it is a chart or graph, summarize the data points and trends. If it is a diagram, explain the flow.',
+                                                'images': [image_bytes]
+                                            }]
+                                        )
+                                        
+                                        description = response['message']['content']
+                                        desc_marker = f"\n\n[IMAGE DESCRIPTION: {description}]\n\n"
+                                        text_parts.append(desc_marker)
+                                        if logger.isEnabledFor(logging.DEBUG):
+                                            logger.debug(f"         └─ Generated description: {description[:50]}...")
+                                        
+                                    except Exception as img_err:
+                                        logger.warning(f"         ⚠️ Failed to process image: {img_err}")
+                                        
+                        except ImportError:
+                            logger.warning("      ⚠️ Multimodal dependencies (ollama, pillow) missing. Skipping images.")
+                        except Exception as mm_err:
+                            logger.warning(f"      ⚠️ Multimodal processing error: {mm_err}")
             
             full_text = "\n\n".join(text_parts)
-            logger.info(f"   └─ Total extracted: {len(full_text)} characters")
+            logger.info(f"   └─ Total extracted: {pages_with_text} pages, {len(full_text)} characters")
             
             return full_text
             
@@ -5,10 +5,13 @@
 """
 
 import os
-import numpy as np
-from typing import List
-from services.document_parser import DocumentParser
-from services.chunking import get_text_chunker
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from config.settings import settings
+from services.parse_worker import parse_and_chunk
 from services.embeddings import get_embedding_service
 from services.vector_store import get_vector_store
 from services.bm25_service import get_bm25_service
@@ -18,6 +21,37 @@ from utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Stages run in worker threads and DOC_WORKERS documents may be in
+# flight at once, so writes to each shared index are serialized
+_VECTOR_LOCK = threading.Lock()
+_BM25_LOCK = threading.Lock()
+_GRAPH_LOCK = threading.Lock()
+
+# Shared process pool for CPU-bound parse + chunk work
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Get or create the parse/chunk process pool"""
+    global _parse_pool
+    if _parse_pool is None:
+        # Spawned, not forked: a fork would copy the parent's torch/CUDA/OpenMP
+        # state (which can deadlock) and its whole heap into every worker;
+        # a spawned worker only imports services.parse_worker
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=settings.PARSE_WORKERS or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    """Stop the parse/chunk worker processes"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
 
 async def process_document(file_path: str, file_id: str):
     """
@@ -39,28 +73,19 @@ async def process_document(file_path: str, file_id: str):
         logger.info("═" * 60)
         
         # ─────────────────────────────────────
-        # Step 1: Parse document
+        # Steps 1-2: Parse + chunk (worker process)
         # ─────────────────────────────────────
-        logger.info("\n📋 STEP 1: Parsing Document")
+        logger.info("\n📋 STEP 1-2: Parsing & Chunking Document")
         logger.info("─" * 40)
         
-        parser = DocumentParser()
-        text = parser.parse(file_path)
+        loop = asyncio.get_running_loop()
+        num_chars, chunks = await loop.run_in_executor(get_parse_pool(), parse_and_chunk, file_path)
         
-        if not text or not text.strip():
+        if not num_chars:
             logger.warning("⚠️ No text extracted from document")
             return
         
-        logger.info(f"✅ Extracted: {len(text)} characters")
-        
-        # ─────────────────────────────────────
-        # Step 2: Chunk text
-        # ─────────────────────────────────────
-        logger.info("\n✂️ STEP 2: Chunking Text")
-        logger.info("─" * 40)
-        
-        chunker = get_text_chunker()
-        chunks = chunker.chunk_text(text)
+        logger.info(f"✅ Extracted: {num_chars} characters")
         
         if not chunks:
             logger.warning("⚠️ No chunks generated")
@@ -69,115 +94,38 @@ async def process_document(file_path: str, file_id: str):
         logger.info(f"✅ Generated: {len(chunks)} chunks")
         
         # ─────────────────────────────────────
-        # Step 3: Generate embeddings
+        # Steps 3-6: Independent stages run concurrently
         # ─────────────────────────────────────
-        logger.info("\n🧠 STEP 3: Generating Embeddings")
-        logger.info("─" * 40)
-        
-        embedding_service = get_embedding_service()
-        
-        # Process in batches to avoid token limits
-        BATCH_SIZE = 16  # Azure OpenAI batch limit
-        all_embeddings = []
-        
-        total_batches = (len(chunks) - 1) // BATCH_SIZE + 1
-        
-        for i in range(0, len(chunks), BATCH_SIZE):
-            batch = chunks[i:i+BATCH_SIZE]
-            batch_num = i // BATCH_SIZE + 1
-            
-            logger.info(f"   └─ Batch {batch_num}/{total_batches}: {len(batch)} chunks")
-            
-            batch_embeddings = embedding_service.embed_texts(batch)
-            all_embeddings.append(batch_embeddings)
-        
-        # Concatenate all embeddings
-        embeddings = np.vstack(all_embeddings)
-        
-        logger.info(f"✅ Embeddings shape: {embeddings.shape}")
-        
-        # ─────────────────────────────────────
-        # Step 4: Store in vector database
-        # ─────────────────────────────────────
-        logger.info("\n💾 STEP 4: Storing in Vector Database")
-        logger.info("─" * 40)
-        
-        vector_store = get_vector_store()
-        
-        vector_store.add_chunks(
-            file_id=file_id,
-            filename=filename,
-            chunks=chunks,
-            embeddings=embeddings
+        # Embedding/indexing, BM25 and graph extraction only depend on
+        # the chunks, so the local model and the Azure extraction calls
+        # overlap instead of running back to back
+        # All three always run to completion, so a failed embedding can
+        # roll back what the other two already wrote
+        vector_result, bm25_result, graph_result = await asyncio.gather(
+            asyncio.to_thread(_embed_and_index, file_id, filename, chunks),
+            asyncio.to_thread(_build_bm25_index, file_id, chunks),
+            asyncio.to_thread(_extract_knowledge_graph, file_id, chunks),
+            return_exceptions=True
         )
         
-        # ─────────────────────────────────────
-        # Step 5: Build BM25 Index
-        # ─────────────────────────────────────
-        logger.info("\n🔨 STEP 5: Building BM25 Keyword Index")
-        logger.info("─" * 40)
+        if isinstance(vector_result, BaseException):
+            await asyncio.to_thread(_rollback_side_indexes, file_id)
+            raise vector_result
         
-        bm25_service = get_bm25_service()
-        
-        # Prepare chunks for BM25 (need id and content)
-        bm25_chunks = [
-            {
-                "id": f"{file_id}_chunk_{i}",
-                "content": chunk,
-                "file_id": file_id,
-                "chunk_index": i
-            }
-            for i, chunk in enumerate(chunks)
+        # The document is searchable; record which side index missed it
+        stage_errors = [
+            f"{stage}: {result}"
+            for stage, result in (("BM25", bm25_result), ("Knowledge graph", graph_result))
+            if isinstance(result, BaseException)
         ]
+        if stage_errors:
+            logger.warning(f"⚠️ Indexed {file_id} with errors: {'; '.join(stage_errors)}")
+            get_vector_store().mark_as_partial(file_id, "; ".join(stage_errors))
         
-        bm25_service.build_index(bm25_chunks)
-        
-        # ─────────────────────────────────────
-        # Step 6: Extract Knowledge Graph
-        # ─────────────────────────────────────
-        logger.info("\n🕸️  STEP 6: Extracting Knowledge Graph")
-        logger.info("─" * 40)
-        
-        entity_extractor = get_entity_extractor()
-        graph_service = get_graph_service()
-        
-        # Process larger parent chunks for graph extraction
-        # (better context for entity relationships)
-        parent_chunk_size = 1500
-        parent_chunks = []
-        
-        # Create parent chunks by combining consecutive chunks
-        for i in range(0, len(chunks), 3):
-            parent_text = ' '.join(chunks[i:i+3])
-            if len(parent_text) > 100:  # Skip tiny chunks
-                parent_chunks.append({
-                    'id': f"{file_id}_parent_{i}",
-                    'text': parent_text
-                })
-        
-        logger.info(f"   └─ Processing {len(parent_chunks)} parent chunks for extraction...")
-        
-        total_entities = 0
-        total_relationships = 0
-        
-        for parent_chunk in parent_chunks:
-            # Extract entities and relationships
-            extraction_result = entity_extractor.extract(
-                text=parent_chunk['text'],
-                chunk_id=parent_chunk['id']
-            )
-            
-            # Add to graph
-            graph_service.add_extraction_result(extraction_result, file_id)
-            
-            total_entities += len(extraction_result.get('entities', []))
-            total_relationships += len(extraction_result.get('relationships', []))
-        
-        logger.info(f"   └─ Extracted: {total_entities} entities, {total_relationships} relationships")
-        
-        # Get graph stats
-        graph_stats = graph_service.get_stats()
-        logger.info(f"   └─ Graph now contains: {graph_stats['total_nodes']} nodes, {graph_stats['total_edges']} edges")
+        if isinstance(graph_result, BaseException):
+            total_entities = total_relationships = 0
+        else:
+            total_entities, total_relationships = graph_result
         
         # ─────────────────────────────────────
         # Complete!
@@ -187,8 +135,11 @@ async def process_document(file_path: str, file_id: str):
         logger.info(f"   └─ File ID: {file_id}")
         logger.info(f"   └─ Chunks: {len(chunks)}")
         logger.info(f"   └─ Vector Index: ✅")
-        logger.info(f"   └─ BM25 Index: ✅")
-        logger.info(f"   └─ Knowledge Graph: ✅ (+{total_entities} entities, +{total_relationships} rels)")
+        logger.info(f"   └─ BM25 Index: {'❌' if isinstance(bm25_result, BaseException) else '✅'}")
+        if isinstance(graph_result, BaseException):
+            logger.info(f"   └─ Knowledge Graph: ❌")
+        else:
+            logger.info(f"   └─ Knowledge Graph: ✅ (+{total_entities} entities, +{total_relationships} rels)")
         logger.info(f"   └─ Ready for Ultimate Hybrid RAG queries")
         logger.info("═" * 60 + "\n")
         
@@ -203,3 +154,166 @@ async def process_document(file_path: str, file_id: str):
             logger.error(f"Failed to update vector store status: {ve}")
             
         raise
+
+
+def _embed_and_index(file_id: str, filename: str, chunks: List[str]):
+    """Steps 3-4: embed chunks and store them in the vector database (blocking)"""
+    
+    # ─────────────────────────────────────
+    # Step 3: Generate embeddings
+    # ─────────────────────────────────────
+    logger.info("\n🧠 STEP 3: Generating Embeddings")
+    logger.info("─" * 40)
+    
+    embedding_service = get_embedding_service()
+    
+    # Single call; the model batches internally (EMBED_BATCH_SIZE)
+    embeddings = embedding_service.embed_texts(chunks)
+    
+    logger.info(f"✅ Embeddings shape: {embeddings.shape}")
+    
+    # ─────────────────────────────────────
+    # Step 4: Store in vector database
+    # ─────────────────────────────────────
+    logger.info("\n💾 STEP 4: Storing in Vector Database")
+    logger.info("─" * 40)
+    
+    vector_store = get_vector_store()
+    
+    with _VECTOR_LOCK:
+        vector_store.add_chunks(
+            file_id=file_id,
+            filename=filename,
+            chunks=chunks,
+            embeddings=embeddings,
+            flush=False  # written once the upload queue drains
+        )
+
+
+def flush_vector_store():
+    """Write pending vector store changes to disk (blocking)"""
+    with _VECTOR_LOCK:
+        get_vector_store().flush()
+
+
+def _rollback_side_indexes(file_id: str):
+    """Remove a failed file's BM25 and graph entries (blocking)"""
+    logger.info(f"↩️ Rolling back BM25 / graph entries for {file_id}")
+    
+    try:
+        with _BM25_LOCK:
+            get_bm25_service().remove_file(file_id)
+    except Exception as e:
+        logger.error(f"❌ BM25 rollback failed for {file_id}: {e}")
+    
+    try:
+        with _GRAPH_LOCK:
+            get_graph_service().remove_file(file_id)
+    except Exception as e:
+        logger.error(f"❌ Graph rollback failed for {file_id}: {e}")
+
+
+def _build_bm25_index(file_id: str, chunks: List[str]):
+    """Step 5: build the BM25 keyword index (blocking)"""
+    
+    logger.info("\n🔨 STEP 5: Building BM25 Keyword Index")
+    logger.info("─" * 40)
+    
+    bm25_service = get_bm25_service()
+    
+    # Prepare chunks for BM25 (need id and content)
+    bm25_chunks = [
+        {
+            "id": f"{file_id}_chunk_{i}",
+            "content": chunk,
+            "file_id": file_id,
+            "chunk_index": i
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+    
+    with _BM25_LOCK:
+        bm25_service.build_index(bm25_chunks)
+
+
+def _extract_knowledge_graph(file_id: str, chunks: List[str]) -> Tuple[int, int]:
+    """
+    Step 6: extract entities/relationships into the knowledge graph (blocking)
+    
+    Returns:
+        tuple of (entities added, relationships added)
+    """
+    
+    logger.info("\n🕸️  STEP 6: Extracting Knowledge Graph")
+    logger.info("─" * 40)
+    
+    entity_extractor = get_entity_extractor()
+    graph_service = get_graph_service()
+    
+    # Process larger parent chunks for graph extraction
+    # (better context for entity relationships)
+    parent_chunks = []
+    
+    # Create parent chunks by combining consecutive chunks
+    for i in range(0, len(chunks), 3):
+        parent_text = ' '.join(chunks[i:i+3])
+        if len(parent_text) > 100:  # Skip tiny chunks
+            parent_chunks.append({
+                'id': f"{file_id}_parent_{i}",
+                'text': parent_text
+            })
+    
+    logger.info(f"   └─ Processing {len(parent_chunks)} parent chunks for extraction...")
+    
+    total_entities = 0
+    total_relationships = 0
+    
+    for parent_chunk in parent_chunks:
+        # Extract entities and relationships
+        extraction_result = entity_extractor.extract(
+            text=parent_chunk['text'],
+            chunk_id=parent_chunk['id']
+        )
+        
+        # Add to graph
+        with _GRAPH_LOCK:
+            graph_service.add_extraction_result(extraction_result, file_id)
+        
+        total_entities += len(extraction_result.get('entities', []))
+        total_relationships += len(extraction_result.get('relationships', []))
+    
+    logger.info(f"   └─ Extracted: {total_entities} entities, {total_relationships} relationships")
+    
+    # Get graph stats
+    graph_stats = graph_service.get_stats()
+    logger.info(f"   └─ Graph now contains: {graph_stats['total_nodes']} nodes, {graph_stats['total_edges']} edges")
+    
+    return total_entities, total_relationships
+
+
+async def document_worker(queue: asyncio.Queue, worker_id: int):
+    """
+    ┌─────────────────────────────────────────────┐
+    │  👷 Document processing worker              │
+    │  Consumes (file_path, file_id) jobs         │
+    └─────────────────────────────────────────────┘
+    """
+    while True:
+        file_path, file_id = await queue.get()
+        try:
+            logger.info(f"👷 Worker {worker_id} picked up: {file_id}")
+            await process_document(file_path, file_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Already logged and marked as failed by process_document
+            pass
+        finally:
+            queue.task_done()
+        
+        # Persist once per burst of uploads instead of after every document
+        if queue.empty():
+            try:
+                await asyncio.to_thread(flush_vector_store)
+            except Exception as e:
+                logger.error(f"❌ Failed to save vector store: {e}")
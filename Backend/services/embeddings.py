@@ -6,14 +6,31 @@ Uses sentence-transformers for local embedding generation.
 Falls back to this since Azure OpenAI embedding deployment is not available.
 """
 
+import asyncio
+import logging
 import numpy as np
+from functools import lru_cache
 from typing import List
-from sentence_transformers import SentenceTransformer
 from config.settings import settings
+from config import embedding_config
 from utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Imported by _load_torch() when the EmbeddingService is built, so importing
+# this module (routes, spawned parse workers re-importing main) doesn't load torch
+torch = None
+SentenceTransformer = None
+
+
+def _load_torch():
+    global torch, SentenceTransformer
+    if torch is None:
+        import torch as torch_module
+        from sentence_transformers import SentenceTransformer as sentence_transformer
+        torch = torch_module
+        SentenceTransformer = sentence_transformer
+
 
 class EmbeddingService:
     """
@@ -24,17 +41,49 @@ class EmbeddingService:
     """
     
     # Model produces 768-dimensional embeddings (better quality than 384)
-    MODEL_NAME = "all-mpnet-base-v2"
-    EMBEDDING_DIMENSION = 768
+    MODEL_NAME = embedding_config.MODEL_NAME
+    EMBEDDING_DIMENSION = embedding_config.EMBEDDING_DIMENSION
+    MAX_SEQ_LENGTH = embedding_config.MAX_SEQ_LENGTH
+    GPU_BATCH_SIZE = 128
+    QUERY_CACHE_SIZE = 1024
     
     def __init__(self):
         logger.info(f"🧠 Loading local embedding model: {self.MODEL_NAME}...")
-        self.model = SentenceTransformer(self.MODEL_NAME)
+        _load_torch()
+        self.backend = settings.EMBED_BACKEND.lower()
+        if self.backend == "onnx":
+            # Dynamic INT8 graph run through ONNX Runtime (needs optimum[onnxruntime])
+            self.device = "cpu"
+            self.model = SentenceTransformer(
+                self.MODEL_NAME,
+                backend="onnx",
+                model_kwargs={"file_name": settings.EMBED_ONNX_FILE}
+            )
+        else:
+            self.device = self._resolve_device()
+            self.model = SentenceTransformer(self.MODEL_NAME, device=self.device)
+            dtype = settings.EMBED_DTYPE.lower()
+            if dtype == "float16" or (dtype == "auto" and self.device.startswith("cuda")):
+                self.model = self.model.half()
+        self.batch_size = self.GPU_BATCH_SIZE if self.device.startswith("cuda") else settings.EMBED_BATCH_SIZE
         self.dimension = self.EMBEDDING_DIMENSION
         
+        # Exact-match LRU for query vectors (retries, repeated questions, recaps)
+        self._encode_query_cached = lru_cache(maxsize=self.QUERY_CACHE_SIZE)(self._encode_query)
+        
         logger.info(f"🧠 EmbeddingService initialized (LOCAL)")
         logger.info(f"   └─ Model: {self.MODEL_NAME}")
+        logger.info(f"   └─ Backend: {self.backend}")
+        logger.info(f"   └─ Device: {self.device}")
         logger.info(f"   └─ Dimension: {self.dimension}")
+    
+    @staticmethod
+    def _resolve_device() -> str:
+        """Pick the inference device (EMBED_DEVICE=auto prefers CUDA)"""
+        device = settings.EMBED_DEVICE.lower()
+        if device == "auto":
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        return device
 
     
     def embed_texts(self, texts: List[str]) -> np.ndarray:
@@ -50,15 +99,27 @@ class EmbeddingService:
         if not texts:
             return np.array([])
         
-        logger.info(f"🧠 Generating embeddings for {len(texts)} texts...")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"🧠 Generating embeddings for {len(texts)} texts...")
         
         try:
-            # Generate embeddings using sentence-transformers
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
-            embeddings_array = embeddings.astype(np.float32)
+            # One encode call: sentence-transformers length-sorts and
+            # micro-batches internally, so padding stays minimal
+            with torch.inference_mode():
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True
+                )
+            # No-op when encode already produced float32 (FP16 on GPU still converts)
+            embeddings_array = embeddings.astype(np.float32, copy=False)
             
-            logger.info(f"   └─ Generated: {len(embeddings)} embeddings")
-            logger.info(f"   └─ Shape: {embeddings_array.shape}")
+            if debug:
+                logger.debug(f"   └─ Generated: {len(embeddings)} embeddings")
+                logger.debug(f"   └─ Shape: {embeddings_array.shape}")
             
             return embeddings_array
             
@@ -74,10 +135,23 @@ class EmbeddingService:
             query: Query text
             
         Returns:
-            NumPy array of shape (768,)
+            NumPy array of shape (768,) - read-only, shared with the query cache
         """
-        embeddings = self.embed_texts([query])
-        return embeddings[0] if len(embeddings) > 0 else np.array([])
+        return np.frombuffer(self._encode_query_cached(query), dtype=np.float32)
+    
+    def _encode_query(self, query: str) -> bytes:
+        """Encode one query; returns immutable bytes so cached vectors can't be mutated"""
+        # Single-string fast path: encode returns a 1-D vector directly,
+        # skipping the batch wrapping/indexing of embed_texts
+        with torch.inference_mode():
+            embedding = self.model.encode(
+                query,
+                batch_size=1,
+                show_progress_bar=False,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+        return np.ascontiguousarray(embedding, dtype=np.float32).tobytes()
 
 
 # Global embedding service instance
@@ -92,11 +166,16 @@ def get_embedding_service() -> EmbeddingService:
     return _embedding_service
 
 
+def _probe_embedding() -> np.ndarray:
+    """Embed a fixed probe string (blocking)"""
+    return get_embedding_service().embed_query("test")
+
+
 async def test_azure_connection() -> bool:
     """Test embedding service connection"""
     try:
-        service = get_embedding_service()
-        test_embedding = service.embed_query("test")
+        # Run the model off the event loop so callers can time out
+        test_embedding = await asyncio.to_thread(_probe_embedding)
         return len(test_embedding) == EmbeddingService.EMBEDDING_DIMENSION
     except Exception as e:
         logger.error(f"❌ Embedding service test failed: {e}")
@@ -5,6 +5,7 @@
 """
 
 import json
+import logging
 import os
 from typing import Dict, List
 from openai import AzureOpenAI
@@ -74,7 +75,8 @@ class EntityExtractor:
                 "chunk_id": chunk_id
             }
         """
-        logger.info(f"🧠 Extracting entities from chunk {chunk_id}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🧠 Extracting entities from chunk {chunk_id}...")
         
         # Prepare prompt (Escape braces in text to prevent format errors)
         safe_text = text[:4000].replace("{", "{{").replace("}", "}}")
@@ -134,10 +136,11 @@ class EntityExtractor:
                 logger.warning(f"⚠️  Truncating {len(result['relationships'])} relationships to {graph_config.MAX_RELATIONSHIPS_PER_CHUNK}")
                 result['relationships'] = result['relationships'][:graph_config.MAX_RELATIONSHIPS_PER_CHUNK]
             
-            logger.info(
-                f"   └─ Found: {len(result.get('entities', []))} entities, "
-                f"{len(result.get('relationships', []))} relationships"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"   └─ Found: {len(result.get('entities', []))} entities, "
+                    f"{len(result.get('relationships', []))} relationships"
+                )
             
             return result
             
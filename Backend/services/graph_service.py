@@ -5,6 +5,7 @@
 """
 
 import json
+import logging
 import os
 from typing import List, Dict, Optional
 from collections import defaultdict
@@ -75,10 +76,11 @@ class GraphService:
         entities = extraction_result.get('entities', [])
         relationships = extraction_result.get('relationships', [])
         
-        logger.info(
-            f"📥 Adding to graph: {len(entities)} entities, "
-            f"{len(relationships)} relationships"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"📥 Adding to graph: {len(entities)} entities, "
+                f"{len(relationships)} relationships"
+            )
         
         # Add entities (nodes)
         for entity in entities:
@@ -124,6 +126,37 @@ class GraphService:
         # Save to disk
         self._save_all()
     
+    def remove_file(self, file_id: str):
+        """
+        Drop everything one file contributed (rolls back a failed upload)
+        
+        Entities also seen in other files keep those source chunks;
+        entities left without any are removed with their edges.
+        """
+        prefix = f"{file_id}_"
+        
+        for entity_id, chunk_ids in list(self.entity_chunks.items()):
+            kept = [c for c in chunk_ids if not c.startswith(prefix)]
+            if kept:
+                self.entity_chunks[entity_id] = kept
+            else:
+                del self.entity_chunks[entity_id]
+        
+        for node_id, node in list(self.nodes.items()):
+            kept = [c for c in node.get('source_chunks', []) if not c.startswith(prefix)]
+            if kept:
+                node['source_chunks'] = kept
+            else:
+                del self.nodes[node_id]
+        
+        self.edges = [
+            edge for edge in self.edges
+            if edge.get('file_id') != file_id
+            and edge['from_id'] in self.nodes and edge['to_id'] in self.nodes
+        ]
+        
+        self._save_all()
+    
     def _save_all(self):
         """Save all graph data"""
         self._save_json(self.nodes_path, self.nodes)
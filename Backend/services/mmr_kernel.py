@@ -0,0 +1,100 @@
+"""
+═══════════════════════════════════════════════════════════════
+ 🌌 COSMIC AI - MMR Diversification Kernel
+═══════════════════════════════════════════════════════════════
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    # numba is optional; mmr_select falls back to a NumPy loop
+    HAS_NUMBA = False
+
+
+def _mmr_numpy(query: np.ndarray, candidates: np.ndarray, k: int, lam: float) -> np.ndarray:
+    """Greedy MMR with one matrix-vector product per selected item"""
+    n = candidates.shape[0]
+    k = min(k, n)
+    relevance = candidates @ query
+    max_sim = np.zeros(n, dtype=np.float32)  # No redundancy before the first pick
+    chosen = np.zeros(n, dtype=np.bool_)
+    selected = np.empty(k, dtype=np.int64)
+
+    for step in range(k):
+        scores = lam * relevance - (1.0 - lam) * max_sim
+        scores[chosen] = -np.inf
+        best = int(np.argmax(scores))
+        selected[step] = best
+        chosen[best] = True
+        if step == 0:
+            max_sim = candidates @ candidates[best]
+        else:
+            np.maximum(max_sim, candidates @ candidates[best], out=max_sim)
+
+    return selected
+
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _mmr_kernel(query, candidates, k, lam):
+        # Floats only, explicit loops: stays in nopython mode, no BLAS needed
+        n, dim = candidates.shape
+        k = min(k, n)
+        relevance = np.empty(n, dtype=np.float32)
+        for i in range(n):
+            acc = 0.0
+            for d in range(dim):
+                acc += candidates[i, d] * query[d]
+            relevance[i] = acc
+
+        max_sim = np.zeros(n, dtype=np.float32)
+        chosen = np.zeros(n, dtype=np.bool_)
+        selected = np.empty(k, dtype=np.int64)
+
+        for step in range(k):
+            best = -1
+            best_score = -np.inf
+            for i in range(n):
+                if chosen[i]:
+                    continue
+                score = lam * relevance[i] - (1.0 - lam) * max_sim[i]
+                if score > best_score:
+                    best_score = score
+                    best = i
+            selected[step] = best
+            chosen[best] = True
+
+            for i in range(n):
+                if chosen[i]:
+                    continue
+                acc = 0.0
+                for d in range(dim):
+                    acc += candidates[i, d] * candidates[best, d]
+                if step == 0 or acc > max_sim[i]:
+                    max_sim[i] = acc
+
+        return selected
+
+
+def mmr_select(query: np.ndarray, candidates: np.ndarray, k: int, lam: float = 0.5) -> np.ndarray:
+    """
+    Pick k candidates by Maximal Marginal Relevance
+
+    Each step takes the candidate maximizing
+    lam * sim(query, c) - (1 - lam) * max sim(c, already picked),
+    so lam=1 is plain relevance order and lower values favour diversity.
+    Vectors must be L2-normalized.
+
+    Returns:
+        indices into candidates, in selection order
+    """
+    query = np.ascontiguousarray(query, dtype=np.float32).reshape(-1)
+    candidates = np.ascontiguousarray(candidates, dtype=np.float32)
+    if candidates.shape[0] == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if HAS_NUMBA:
+        return _mmr_kernel(query, candidates, k, np.float32(lam))
+    return _mmr_numpy(query, candidates, k, lam)
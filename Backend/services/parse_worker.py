@@ -0,0 +1,26 @@
+"""
+═══════════════════════════════════════════════════════════════
+ 🌌 COSMIC AI - Parse/Chunk Worker Entry Point
+═══════════════════════════════════════════════════════════════
+Runs inside the parse-pool processes. Kept apart from
+document_processor so a spawned worker only imports the parser and
+the chunker, not the embedding model (torch), FAISS or the indexes.
+"""
+
+from typing import List, Tuple
+from services.document_parser import DocumentParser
+from services.chunking import get_text_chunker
+
+
+def parse_and_chunk(file_path: str) -> Tuple[int, List[str]]:
+    """
+    Steps 1-2 in a worker process: parse the file and chunk its text.
+    Only the chunks travel back, not the full document text.
+    
+    Returns:
+        tuple of (extracted characters, chunks)
+    """
+    text = DocumentParser().parse(file_path)
+    if not text or not text.strip():
+        return 0, []
+    return len(text), get_text_chunker().chunk_text(text)
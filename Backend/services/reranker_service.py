@@ -5,7 +5,6 @@
 """
 
 from typing import List, Dict, Tuple, Optional
-from sentence_transformers import CrossEncoder
 from utils.logger import setup_logger
 
 logger = setup_logger()
@@ -39,6 +38,8 @@ class RerankerService:
         """
         logger.info(f"🔄 Loading cross-encoder: {model_name}...")
         try:
+            # Imported here so importing this module doesn't load torch
+            from sentence_transformers import CrossEncoder
             self.model = CrossEncoder(model_name, device=device)
             logger.info(f"✅ Cross-encoder loaded successfully")
             self.model_loaded = True
@@ -5,8 +5,74 @@
 """
 
 from typing import List, Dict, Optional
-from datetime import datetime
 import re
+import time
+
+
+# One pass over the answer in _format_answer_text; per line, first match wins:
+#   code   - a ``` fenced block (to the closing fence or end of text), untouched
+#   bullet - "- ", "* " or "• " item; group holds the text after the marker
+#   num    - "1." .. "9." item
+_ANSWER_RE = re.compile(
+    r'(?P<code>^[^\S\n]*```[^\n]*(?:\n(?![^\S\n]*```)[^\n]*)*(?:\n[^\S\n]*```[^\n]*|\Z))'
+    r'|^[^\S\n]*[-*•] (?=[^\n]*\S)[^\S\n]*(?P<bullet>[^\n]*)'
+    r'|^[^\S\n]*(?P<num>[1-9]\.[^\n]*)',
+    re.MULTILINE
+)
+
+
+def _format_answer_match(match: re.Match) -> str:
+    if match.group('code') is not None:
+        return match.group('code')
+    if match.group('bullet') is not None:
+        # Replace with professional bullet
+        return f"  • {match.group('bullet')}"
+    # Numbered lists
+    return f"  {match.group('num').strip()}"
+
+# Icons used on every formatted response, bound once at module level
+_ICON_BULLET = "•"
+_ICON_DOCUMENT = "📄"
+_ICON_QUOTE = "💬"
+_ICON_ERROR = "❌"
+_ICON_INFO = "ℹ️"
+_ICON_STAR = "⭐"
+_ICON_SEARCH = "🔍"
+
+# One source entry; the preview line is dropped for chunks without content
+_SOURCE_HEAD = (
+    f"  {_ICON_BULLET} **Source #{{i}}** (Relevance: {{rel}}%)\n"
+    f"    {_ICON_DOCUMENT} Document ID: `{{fid}}...`\n"
+)
+_SOURCE_TEMPLATE = _SOURCE_HEAD + f"    {_ICON_QUOTE} _\"{{preview}}...\"_\n"
+
+
+def _format_source(i: int, chunk: Dict) -> str:
+    score = chunk.get('score', 0.0)
+    preview = chunk.get('content', '')[:80]
+    return (_SOURCE_TEMPLATE if preview else _SOURCE_HEAD).format(
+        i=i,
+        fid=chunk.get('file_id', 'unknown')[:12],
+        # Relevance percentage (scores above 1 are already percentages)
+        rel=int(score * 100) if score <= 1 else score,
+        preview=preview
+    )
+
+# Fixed pieces of the metadata footer
+_FOOTER_HEAD = "\n" + "─" * 50 + "\n\n"
+_FOOTER_MODEL = f"{_ICON_STAR} **Model:** "
+_FOOTER_SEARCHED = f"{_ICON_SEARCH} **Documents Searched:** "
+_FOOTER_TIME_FMT = "🕐 **Generated:** %H:%M:%S"
+
+# Box border strings keyed by width; headers reuse a handful of widths
+_BORDER_CACHE: Dict[int, str] = {}
+
+
+def _border(width: int) -> str:
+    border = _BORDER_CACHE.get(width)
+    if border is None:
+        border = _BORDER_CACHE.setdefault(width, '─' * width)
+    return border
 
 
 class ResponseFormatter:
@@ -21,20 +87,20 @@ class ResponseFormatter:
     ICONS = {
         "answer": "💡",
         "source": "📚",
-        "info": "ℹ️",
+        "info": _ICON_INFO,
         "warning": "⚠️",
         "success": "✅",
-        "error": "❌",
-        "search": "🔍",
-        "document": "📄",
+        "error": _ICON_ERROR,
+        "search": _ICON_SEARCH,
+        "document": _ICON_DOCUMENT,
         "context": "🎯",
         "summary": "📝",
         "code": "```",
-        "quote": "💬",
-        "bullet": "•",
+        "quote": _ICON_QUOTE,
+        "bullet": _ICON_BULLET,
         "arrow": "→",
         "check": "✓",
-        "star": "⭐"
+        "star": _ICON_STAR
     }
     
     @staticmethod
@@ -84,15 +150,9 @@ class ResponseFormatter:
     def _create_section_header(title: str, icon: str = "") -> str:
         """Create a beautiful section header with borders"""
         header_text = f"{icon} {title}" if icon else title
-        border_length = len(header_text) + 4
-        
-        header = f"""
-┌{'─' * border_length}┐
-│  {header_text}  │
-└{'─' * border_length}┘
-""".strip()
+        border = _border(len(header_text) + 4)
         
-        return header
+        return f"┌{border}┐\n│  {header_text}  │\n└{border}┘"
     
     @staticmethod
     def _format_answer_text(text: str) -> str:
@@ -103,37 +163,8 @@ class ResponseFormatter:
         - Add proper spacing
         """
         
-        # Clean up the text
-        text = text.strip()
-        
-        # Enhance markdown formatting
-        lines = text.split('\n')
-        formatted_lines = []
-        
-        in_code_block = False
-        for line in lines:
-            # Detect code blocks
-            if line.strip().startswith('```'):
-                in_code_block = not in_code_block
-                formatted_lines.append(line)
-                continue
-            
-            if in_code_block:
-                formatted_lines.append(line)
-                continue
-            
-            # Enhance list items
-            if line.strip().startswith(('- ', '* ', '• ')):
-                # Replace with professional bullet
-                cleaned_line = re.sub(r'^[\s]*[-*•][\s]*', '', line)
-                formatted_lines.append(f"  • {cleaned_line}")
-            elif line.strip().startswith(tuple(f"{i}." for i in range(1, 10))):
-                # Numbered lists
-                formatted_lines.append(f"  {line.strip()}")
-            else:
-                formatted_lines.append(line)
-        
-        return '\n'.join(formatted_lines)
+        # Clean up the text, then enhance markdown formatting
+        return _ANSWER_RE.sub(_format_answer_match, text.strip())
     
     @staticmethod
     def _format_sources(chunks: List[Dict]) -> str:
@@ -142,27 +173,7 @@ class ResponseFormatter:
         Shows: document name, relevance score, and snippet preview
         """
         
-        sources_text = []
-        
-        for i, chunk in enumerate(chunks, 1):
-            file_id = chunk.get('file_id', 'unknown')
-            score = chunk.get('score', 0.0)
-            content_preview = chunk.get('content', '')[:80]
-            
-            # Calculate relevance percentage
-            relevance = int(score * 100) if score <= 1 else score
-            
-            # Create source entry
-            source_entry = f"  {ResponseFormatter.ICONS['bullet']} **Source #{i}**"
-            source_entry += f" (Relevance: {relevance}%)\n"
-            source_entry += f"    {ResponseFormatter.ICONS['document']} Document ID: `{file_id[:12]}...`\n"
-            
-            if content_preview:
-                source_entry += f"    {ResponseFormatter.ICONS['quote']} _\"{content_preview}...\"_\n"
-            
-            sources_text.append(source_entry)
-        
-        return '\n'.join(sources_text)
+        return '\n'.join(_format_source(i, chunk) for i, chunk in enumerate(chunks, 1))
     
     @staticmethod
     def format_error_response(error_message: str, query: str = "") -> str:
@@ -175,15 +186,15 @@ class ResponseFormatter:
         sections.append("")
         
         # Friendly error message
-        sections.append(f"{ResponseFormatter.ICONS['error']} I encountered an issue while processing your request.")
+        sections.append(f"{_ICON_ERROR} I encountered an issue while processing your request.")
         sections.append("")
         sections.append("**What happened:**")
-        sections.append(f"  {ResponseFormatter.ICONS['info']} {error_message}")
+        sections.append(f"  {_ICON_INFO} {error_message}")
         sections.append("")
         sections.append("**What you can try:**")
-        sections.append(f"  {ResponseFormatter.ICONS['bullet']} Rephrase your question")
-        sections.append(f"  {ResponseFormatter.ICONS['bullet']} Upload relevant documents first")
-        sections.append(f"  {ResponseFormatter.ICONS['bullet']} Check your internet connection")
+        sections.append(f"  {_ICON_BULLET} Rephrase your question")
+        sections.append(f"  {_ICON_BULLET} Upload relevant documents first")
+        sections.append(f"  {_ICON_BULLET} Check your internet connection")
         sections.append("")
         
         return '\n'.join(sections)
@@ -196,12 +207,12 @@ class ResponseFormatter:
         
         sections.append(ResponseFormatter._create_section_header("No Documents Found", "🔍"))
         sections.append("")
-        sections.append(f"{ResponseFormatter.ICONS['info']} I couldn't find relevant information in your uploaded documents.")
+        sections.append(f"{_ICON_INFO} I couldn't find relevant information in your uploaded documents.")
         sections.append("")
         sections.append("**Suggestions:**")
-        sections.append(f"  {ResponseFormatter.ICONS['bullet']} Upload documents related to: _{query}_")
-        sections.append(f"  {ResponseFormatter.ICONS['bullet']} Try a different search term")
-        sections.append(f"  {ResponseFormatter.ICONS['bullet']} Check if your documents contain the information you're looking for")
+        sections.append(f"  {_ICON_BULLET} Upload documents related to: _{query}_")
+        sections.append(f"  {_ICON_BULLET} Try a different search term")
+        sections.append(f"  {_ICON_BULLET} Check if your documents contain the information you're looking for")
         sections.append("")
         
         return '\n'.join(sections)
@@ -236,23 +247,15 @@ class ResponseFormatter:
     ) -> str:
         """Create a professional metadata footer"""
         
-        footer = []
-        footer.append("")
-        footer.append("─" * 50)
-        footer.append("")
-        
-        metadata = []
-        metadata.append(f"{ResponseFormatter.ICONS['star']} **Model:** {model}")
+        metadata = [_FOOTER_MODEL + model]
         
         if chunks_searched > 0:
-            metadata.append(f"{ResponseFormatter.ICONS['search']} **Documents Searched:** {chunks_searched}")
+            metadata.append(f"{_FOOTER_SEARCHED}{chunks_searched}")
         
         if response_time_ms:
             metadata.append(f"⏱️ **Response Time:** {response_time_ms}ms")
         
-        metadata.append(f"🕐 **Generated:** {datetime.now().strftime('%H:%M:%S')}")
-        
-        footer.append(" | ".join(metadata))
-        footer.append("")
+        # Local wall-clock time, formatted straight from time.localtime()
+        metadata.append(time.strftime(_FOOTER_TIME_FMT))
         
-        return '\n'.join(footer)
+        return _FOOTER_HEAD + " | ".join(metadata) + "\n"
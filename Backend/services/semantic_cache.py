@@ -0,0 +1,159 @@
+"""
+═══════════════════════════════════════════════════════════════
+ 🧠 Semantic Response Cache
+═══════════════════════════════════════════════════════════════
+"""
+
+import json
+import os
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import cache_config
+from config.settings import settings
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class SemanticResponseCache:
+    """
+    ┌─────────────────────────────────────────────┐
+    │  🧠 Answers keyed by query meaning          │
+    │  Cosine match on normalized embeddings      │
+    └─────────────────────────────────────────────┘
+
+    Entries are only reused for the same file scope and the same
+    corpus generation, so uploads or a clear never serve stale answers.
+    """
+
+    def __init__(self, path: str = None):
+        self.enabled = cache_config.ENABLE_SEMANTIC_CACHE
+        self.threshold = cache_config.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = cache_config.SEMANTIC_CACHE_MAX_ENTRIES
+        self.path = path or settings.VECTOR_DB_PATH
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Dict] = []
+        self._lock = Lock()
+        self._load()
+        logger.info(f"🧠 SemanticResponseCache initialized ({len(self._entries)} entries)")
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def lookup(self, embedding: np.ndarray, scope: Tuple, generation: str) -> Optional[Dict]:
+        """Return the closest cached answer above the threshold, if any"""
+        if not self.enabled:
+            return None
+
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or query.shape[0] != self._vectors.shape[1]:
+                return None
+            scores = self._vectors @ query
+            # Best matches first; stop at the first one from the same scope
+            for idx in np.argsort(-scores):
+                if scores[idx] < self.threshold:
+                    break
+                entry = self._entries[idx]
+                if entry["scope"] == list(scope) and entry.get("generation") == generation:
+                    logger.info(f"⚡ Semantic cache HIT (similarity {scores[idx]:.3f})")
+                    return entry
+        return None
+
+    def insert(
+        self,
+        embedding: np.ndarray,
+        scope: Tuple,
+        generation: str,
+        response: str,
+        chunks_used: int,
+        model: str
+    ):
+        """Store a completed answer"""
+        if not self.enabled or not response:
+            return
+
+        vec = self._normalize(embedding)[np.newaxis, :]
+        entry = {
+            "scope": list(scope),
+            "generation": generation,
+            "response": response,
+            "chunks_used": chunks_used,
+            "model": model
+        }
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vec.shape[1]:
+                self._vectors = vec
+                self._entries = [entry]
+                return
+            self._vectors = np.vstack([self._vectors, vec])
+            self._entries.append(entry)
+            # Drop the oldest answers once full
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._vectors = self._vectors[overflow:]
+                self._entries = self._entries[overflow:]
+
+    # ─────────────────────────────────────────────────────────
+    #  💾 Persistence
+    # ─────────────────────────────────────────────────────────
+
+    def _files(self) -> Tuple[str, str]:
+        return (
+            os.path.join(self.path, "semantic_cache.npy"),
+            os.path.join(self.path, "semantic_cache.json")
+        )
+
+    def save(self):
+        """Persist cached answers (called on shutdown)"""
+        if not self.enabled:
+            return
+        vectors_file, entries_file = self._files()
+        with self._lock:
+            if self._vectors is None:
+                return
+            try:
+                np.save(vectors_file, self._vectors)
+                with open(entries_file, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f, ensure_ascii=False)
+                logger.info(f"💾 Saved {len(self._entries)} semantic cache entries")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not save semantic cache: {e}")
+
+    def _load(self):
+        if not self.enabled:
+            return
+        vectors_file, entries_file = self._files()
+        if not (os.path.exists(vectors_file) and os.path.exists(entries_file)):
+            return
+        try:
+            vectors = np.load(vectors_file)
+            with open(entries_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if len(entries) == len(vectors):
+                self._vectors = vectors.astype(np.float32, copy=False)
+                self._entries = entries
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load semantic cache: {e}")
+
+
+# Global semantic cache instance
+_semantic_cache = None
+
+
+def get_semantic_cache() -> SemanticResponseCache:
+    """Get or create semantic cache singleton"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticResponseCache()
+    return _semantic_cache
+
+
+def save_semantic_cache():
+    """Persist the semantic cache if it was used this run"""
+    if _semantic_cache is not None:
+        _semantic_cache.save()
@@ -9,6 +9,9 @@ from utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Newlines and tabs would break TOON rows; flatten both in one pass
+_TOON_TRANS = str.maketrans({'\n': ' ', '\t': ' '})
+
 
 class ToonFormatter:
     """
@@ -38,8 +41,7 @@ class ToonFormatter:
             return ""
         
         # Header for field names
-        toon = "{file_id, idx, content}\n"
-        toon += f"[{len(chunks)}]\n"
+        parts = ["{file_id, idx, content}", f"[{len(chunks)}]"]
         
         for c in chunks:
             # Truncate content for token efficiency in the formatted output
@@ -47,9 +49,9 @@ class ToonFormatter:
             file_id = c.get('file_id', 'unknown')[:8]  # Shortened file ID
             idx = c.get('chunk_index', 0)
             
-            toon += f"{file_id}\t{idx}\t{content}\n"
+            parts.append(f"{file_id}\t{idx}\t{content}")
         
-        return toon
+        return "\n".join(parts) + "\n"
     
     @staticmethod
     def format_history(history: List[Dict]) -> str:
@@ -65,17 +67,15 @@ class ToonFormatter:
         if not history:
             return ""
         
-        toon = "{role, content}\n"
-        toon += f"[{len(history)}]\n"
+        parts = ["{role, content}", f"[{len(history)}]"]
         
         for m in history:
             role = m.get('role', 'user')
-            content = m.get('content', '')
             # Escape newlines in content
-            content = content.replace('\n', ' ').replace('\t', ' ')
-            toon += f"{role}\t{content}\n"
+            content = m.get('content', '').translate(_TOON_TRANS)
+            parts.append(f"{role}\t{content}")
         
-        return toon
+        return "\n".join(parts) + "\n"
     
     @staticmethod
     def format_full_context(chunks: List[Dict]) -> str:
@@ -4,17 +4,97 @@
 ═══════════════════════════════════════════════════════════════
 """
 
-import faiss
 import numpy as np
-import json
+import orjson
 import os
-from typing import List, Dict, Optional
+import mmap
+import time
+import uuid
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from config import cache_config
 from config.settings import settings
+from services.mmr_kernel import mmr_select
 from utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Binary mode fetches this many Hamming candidates per result for rescoring
+BINARY_RESCORE_FACTOR = 4
+
+# Imported by _load_faiss() when the first VectorStore is built, so importing
+# this module (routes, tools) doesn't load FAISS's native libraries
+faiss = None
+
+
+def _load_faiss():
+    global faiss
+    if faiss is None:
+        import faiss as faiss_module
+        faiss = faiss_module
+    return faiss
+
+
+# ─────────────────────────────────────────────────────────────
+#  🗜️ Embedding Quantization (VECTOR_QUANTIZATION=binary)
+# ─────────────────────────────────────────────────────────────
+
+def _binarize(embeddings: np.ndarray) -> np.ndarray:
+    """1 bit per dimension (sign), packed into uint8 codes"""
+    return np.packbits(embeddings > 0, axis=1)
+
+
+def _sq8_encode(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    8-bit scalar quantization with a per-vector range
+    
+    Components of unit 768-d vectors sit around ±0.04, so a fixed [-1, 1]
+    range would leave most of the 256 levels unused; each vector's own
+    min/max spreads its values over all of them.
+    
+    Returns:
+        tuple of (uint8 codes, float32 [offset, scale] per vector)
+    """
+    low = embeddings.min(axis=1, keepdims=True)
+    scale = (embeddings.max(axis=1, keepdims=True) - low) / 255.0
+    scale[scale == 0] = 1.0  # Constant vector: every code is 0
+    codes = np.round((embeddings - low) / scale).astype(np.uint8)
+    return codes, np.hstack([low, scale]).astype(np.float32)
+
+
+def _sq8_decode(codes: np.ndarray, params: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * params[:, 1:2] + params[:, 0:1]
+
+
+def _sq8_scores(codes: np.ndarray, params: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Dot products of SQ8-coded vectors with query, without decoding them"""
+    return (codes.astype(np.float32) @ query) * params[:, 1] + params[:, 0] * query.sum()
+
+
+# Codes written before per-vector ranges used the fixed [-1, 1] range
+_SQ8_LEGACY_PARAMS = np.array([-1.0, 1.0 / 127.5], dtype=np.float32)
+
+
+def _replace_file(path: str, write):
+    """Write via a temp file and os.replace so readers never see a partial file"""
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_bytes(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _write_npy(path: str, array: np.ndarray):
+    # File handle, since np.save appends ".npy" to the temp path otherwise
+    with open(path, 'wb') as f:
+        np.save(f, array)
+
 
 class VectorStore:
     """
@@ -25,16 +105,56 @@ class VectorStore:
     """
     
     def __init__(self):
+        _load_faiss()
         self.dimension = settings.EMBEDDING_DIMENSION  # Azure OpenAI text-embedding-ada-002 dimension
-        self.index: Optional[faiss.IndexHNSWFlat] = None
+        self.index = None  # faiss.Index / faiss.IndexBinary
         self.chunks: List[Dict] = []
+        self._by_file: Dict[str, List[int]] = {}  # file_id -> positions in self.chunks
+        # Integer code per file_id and one code per chunk, for search filtering
+        self._file_id_code: Dict[str, int] = {}
+        self._chunk_fid_codes = np.empty(0, dtype=np.int32)
         self.metadata: Dict = {"documents": {}}
         self.processing_files: set = set()
-        self.failed_files: Dict[str, str] = {}
-
         
-        self.index_path = os.path.join(settings.VECTOR_DB_PATH, "index.faiss")
-        self.chunks_path = os.path.join(settings.VECTOR_DB_PATH, "chunks.json")
+        # LRU of recent search results: key -> (results, expiry)
+        self._search_cache: OrderedDict = OrderedDict()
+        self._search_cache_lock = Lock()
+        self.failed_files: Dict[str, str] = {}
+        self.partial_files: Dict[str, str] = {}  # indexed, but a side index (BM25/graph) failed
+        self.file_paths: Dict[str, str] = {}
+        
+        # Persistence bookkeeping (see flush)
+        self._dirty = False
+        self._saved_ntotal = 0
+        self._journaled = 0  # Chunks already appended to chunks.jsonl
+        
+        # "binary": Hamming HNSW over sign bits + SQ8 codes for rescoring
+        self.quantization = settings.VECTOR_QUANTIZATION.lower()
+        self.sq8_codes: Optional[np.ndarray] = None
+        self.sq8_params: Optional[np.ndarray] = None  # [offset, scale] per code row
+        
+        # INDEX_FACTORY: any faiss.index_factory string (e.g. "IVF4096,PQ64");
+        # empty keeps the HNSW flat index. Indexes that need training buffer
+        # vectors in _pending until INDEX_TRAIN_SIZE have arrived
+        self.index_factory = settings.INDEX_FACTORY.strip()
+        
+        # Query-only replicas map the saved index instead of reading it into RAM
+        self.read_only = settings.VECTOR_STORE_READ_ONLY
+        self._pending = np.empty((0, self.dimension), dtype=np.float32)
+        
+        if self.quantization == "binary":
+            self.index_path = os.path.join(settings.VECTOR_DB_PATH, "index_binary.faiss")
+        else:
+            self.index_path = os.path.join(settings.VECTOR_DB_PATH, "index.faiss")
+        self.sq8_path = os.path.join(settings.VECTOR_DB_PATH, "embeddings_sq8.npy")
+        self.sq8_params_path = os.path.join(settings.VECTOR_DB_PATH, "embeddings_sq8_params.npy")
+        self.pending_path = os.path.join(settings.VECTOR_DB_PATH, "pending.npy")
+        # Append-only journal, one chunk per line; the chunk text itself lives
+        # in chunks.bin and records only keep its (offset, length)
+        self.chunks_path = os.path.join(settings.VECTOR_DB_PATH, "chunks.jsonl")
+        self.content_path = os.path.join(settings.VECTOR_DB_PATH, "chunks.bin")
+        self._content_map: Optional[mmap.mmap] = None
+        self.legacy_chunks_path = os.path.join(settings.VECTOR_DB_PATH, "chunks.json")
         self.metadata_path = os.path.join(settings.VECTOR_DB_PATH, "metadata.json")
         
         self._initialize_index()
@@ -44,36 +164,99 @@ class VectorStore:
         
         if os.path.exists(self.index_path):
             logger.info("📂 Loading existing FAISS index...")
-            self.index = faiss.read_index(self.index_path)
-            self._load_chunks()
-            self._load_metadata()
+            io_flags = (faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY) if self.read_only else 0
+            if self.quantization == "binary":
+                self.index = faiss.read_index_binary(self.index_path, io_flags)
+                self.sq8_codes = np.load(self.sq8_path, mmap_mode='r' if self.read_only else None)
+                if os.path.exists(self.sq8_params_path):
+                    self.sq8_params = np.load(self.sq8_params_path)
+                else:
+                    self.sq8_params = np.tile(_SQ8_LEGACY_PARAMS, (len(self.sq8_codes), 1))
+            else:
+                self.index = faiss.read_index(self.index_path, io_flags)
             logger.info(f"   └─ Loaded: {self.index.ntotal} vectors")
         else:
-            logger.info("🆕 Creating new FAISS HNSW index...")
-            self.index = faiss.IndexHNSWFlat(
+            logger.info("🆕 Creating new FAISS index...")
+            self.index = self._create_index()
+            logger.info(f"   └─ Index: {self.index_factory or 'HNSW flat'}")
+            logger.info(f"   └─ M: {settings.HNSW_M}")
+            logger.info(f"   └─ efConstruction: {settings.HNSW_EF_CONSTRUCTION}")
+            logger.info(f"   └─ Quantization: {self.quantization}")
+        
+        # Chunks, metadata and untrained vectors are loaded whenever they
+        # exist, not only alongside faiss.index
+        if self.quantization != "binary" and os.path.exists(self.pending_path):
+            self._pending = np.load(self.pending_path)
+        self._load_chunks()
+        self._load_metadata()
+        self._saved_ntotal = self.index.ntotal
+        
+        # Chunk positions are FAISS ids (then pending rows); any drift would
+        # return the wrong text for a hit
+        expected = self.index.ntotal + len(self._pending)
+        if len(self.chunks) != expected:
+            raise RuntimeError(
+                f"Vector store is inconsistent: {len(self.chunks)} chunks on disk "
+                f"but {self.index.ntotal} indexed + {len(self._pending)} pending vectors "
+                f"in {settings.VECTOR_DB_PATH}"
+            )
+    
+    def _create_index(self):
+        """Empty index for the configured quantization / factory string"""
+        if self.quantization == "binary":
+            self.sq8_codes = np.empty((0, self.dimension), dtype=np.uint8)
+            self.sq8_params = np.empty((0, 2), dtype=np.float32)
+            index = faiss.IndexBinaryHNSW(self.dimension, settings.HNSW_M)
+        elif self.index_factory:
+            # Inner product equals cosine similarity on unit vectors
+            index = faiss.index_factory(
+                self.dimension, self.index_factory, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            index = faiss.IndexHNSWFlat(
                 self.dimension,
                 settings.HNSW_M  # Number of connections per layer
             )
-            # Set construction parameter
-            self.index.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
-            logger.info(f"   └─ M: {settings.HNSW_M}")
-            logger.info(f"   └─ efConstruction: {settings.HNSW_EF_CONSTRUCTION}")
+        # Set construction parameter
+        if hasattr(index, "hnsw"):
+            index.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
+        return index
+    
+    def _add_trainable(self, embeddings: np.ndarray):
+        """Buffer vectors until there are enough to train the index, then train and add"""
+        self._pending = np.vstack([self._pending, embeddings])
+        if len(self._pending) < settings.INDEX_TRAIN_SIZE:
+            logger.info(f"   └─ Buffered for training: {len(self._pending)}/{settings.INDEX_TRAIN_SIZE}")
+            return
+        
+        logger.info(f"🏋️ Training {self.index_factory} on {len(self._pending)} vectors...")
+        self.index.train(self._pending)
+        self.index.add(self._pending)
+        self._pending = np.empty((0, self.dimension), dtype=np.float32)
     
     def add_chunks(
         self,
         file_id: str,
         filename: str,
         chunks: List[str],
-        embeddings: np.ndarray
+        embeddings: np.ndarray,
+        flush: bool = True
     ):
         """
         Add document chunks and embeddings to the vector store
         
+        Embeddings must already be L2-normalized (EmbeddingService does this).
+        With flush=False the data is searchable immediately but only
+        written to disk by the next flush() call.
+        
         ┌─────────────────────────────────────────────┐
         │  📥 Adding chunks to vector database        │
         └─────────────────────────────────────────────┘
         """
         
+        if self.read_only:
+            raise RuntimeError("Vector store is read-only (VECTOR_STORE_READ_ONLY=true)")
+        
         if embeddings.shape[0] != len(chunks):
             raise ValueError("Number of embeddings must match number of chunks")
         
@@ -82,41 +265,65 @@ class VectorStore:
         
         logger.info(f"📥 Adding {len(chunks)} chunks to vector store...")
         
-        # Convert to float32 if needed
-        embeddings = embeddings.astype('float32')
+        # Convert to float32 if needed (no copy when it already is)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings)
+        # Embeddings arrive L2-normalized from the encoder
+        # (normalize_embeddings=True), so no extra normalization pass
         
         # Get starting index
         start_idx = len(self.chunks)
         
         # Add embeddings to FAISS index
-        self.index.add(embeddings)
+        if self.quantization == "binary":
+            self.index.add(_binarize(embeddings))
+            codes, params = _sq8_encode(embeddings)
+            self.sq8_codes = np.vstack([self.sq8_codes, codes])
+            self.sq8_params = np.vstack([self.sq8_params, params])
+        elif not self.index.is_trained:
+            self._add_trainable(embeddings)
+        else:
+            self.index.add(embeddings)
+        
+        # Chunk text goes to chunks.bin right away; records point into it
+        spans = self._append_contents(chunks)
         
         # Store chunks with metadata
-        for i, chunk_text in enumerate(chunks):
+        positions = self._by_file.setdefault(file_id, [])
+        for i, (offset, length) in enumerate(spans):
+            positions.append(start_idx + i)
             self.chunks.append({
                 "id": start_idx + i,
                 "file_id": file_id,
-                "content": chunk_text,
-                "chunk_index": i,
-                "tokens": len(chunk_text.split())  # Rough estimate
+                "offset": offset,
+                "length": length,
+                "chunk_index": i
             })
         
+        code = self._file_id_code.setdefault(file_id, len(self._file_id_code))
+        self._chunk_fid_codes = np.concatenate(
+            [self._chunk_fid_codes, np.full(len(chunks), code, dtype=np.int32)]
+        )
+        
         # Update metadata
         self.metadata["documents"][file_id] = {
             "filename": filename,
             "upload_date": datetime.utcnow().isoformat(),
             "num_chunks": len(chunks),
-            "total_tokens": sum(len(c.split()) for c in chunks)
+            "total_tokens": sum(c.count(' ') + 1 for c in chunks)  # Rough estimate
         }
         
         # Remove from processing list
         self.processing_files.discard(file_id)
         
+        # Cached results predate these chunks
+        self._clear_search_cache()
+        self._bump_generation()
+        
         # Persist to disk
-        self._save_all()
+        self._dirty = True
+        if flush:
+            self._save_all()
         
         logger.info(f"   └─ Total vectors: {self.index.ntotal}")
     
@@ -129,6 +336,9 @@ class VectorStore:
         """
         Search for similar chunks using HNSW
         
+        query_embedding must be L2-normalized (EmbeddingService.embed_query
+        returns unit vectors), as with add_chunks.
+        
         ┌─────────────────────────────────────────────┐
         │  🔍 Searching vector database               │
         └─────────────────────────────────────────────┘
@@ -137,69 +347,181 @@ class VectorStore:
             List of dicts with keys: content, score, file_id, chunk_index
         """
         
-        if self.index.ntotal == 0:
+        if not self.chunks:
             logger.warning("⚠️ Vector store is empty")
             return []
         
-        logger.info(f"🔍 Searching for top {top_k} similar chunks...")
+        # Already unit-norm, so no normalize pass; no copy for float32 C-order input
+        query_embedding = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
         
-        # Ensure correct shape and type
-        query_embedding = query_embedding.reshape(1, -1).astype('float32')
+        cache_key = self._search_cache_key(query_embedding, top_k, file_ids)
+        cached = self._search_cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Vector search cache HIT ({len(cached)} chunks)")
+            return cached
         
-        # Normalize for cosine similarity
-        faiss.normalize_L2(query_embedding)
+        logger.info(f"🔍 Searching for top {top_k} similar chunks...")
         
         # Set search parameter
-        self.index.hnsw.efSearch = settings.HNSW_EF_SEARCH
+        self._set_search_params()
         
         # Perform search
         # Get more results if filtering by file_id
         k = top_k * 10 if file_ids else top_k
-        k = min(k, self.index.ntotal)
-        
-        distances, indices = self.index.search(query_embedding, k)
+        if settings.ENABLE_MMR:
+            # MMR needs a wider pool to pick diverse chunks from
+            k = max(k, top_k * settings.MMR_FETCH_FACTOR)
+        
+        if self.quantization == "binary":
+            similarities, indices = self._search_binary(query_embedding, k)
+        elif not self.index.is_trained:
+            similarities, indices = self._search_pending(query_embedding, k)
+        else:
+            k = min(k, self.index.ntotal)
+            distances, indices = self.index.search(query_embedding, k)
+            indices = indices[0]
+            if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+                similarities = distances[0]
+            else:
+                # Convert distance to similarity score (cosine similarity)
+                # L2 distance after normalization: d = 2 - 2*cos(theta)
+                # So: cos(theta) = 1 - d/2
+                similarities = 1.0 - distances[0] * 0.5
+        
+        # FAISS returns -1 for missing results; drop those and apply the
+        # file filter as one mask, then keep top_k survivors
+        keep = indices != -1
+        if file_ids:
+            allowed_codes = np.array(
+                [self._file_id_code[f] for f in file_ids if f in self._file_id_code],
+                dtype=np.int32
+            )
+            keep &= np.isin(self._chunk_fid_codes[indices], allowed_codes)
+        keep = np.flatnonzero(keep)
+        if settings.ENABLE_MMR and len(keep) > top_k:
+            order = mmr_select(
+                query_embedding[0], self._vectors_for(indices[keep]), top_k, settings.MMR_LAMBDA
+            )
+            keep = keep[order]
+        else:
+            keep = keep[:top_k]
         
         # Build results
         results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx == -1:  # FAISS returns -1 for missing results
-                continue
-            
-            chunk = self.chunks[idx]
-            
-            # Filter by file_ids if specified
-            if file_ids and chunk["file_id"] not in file_ids:
-                continue
-            
-            # Convert distance to similarity score (cosine similarity)
-            # L2 distance after normalization: d = 2 - 2*cos(theta)
-            # So: cos(theta) = 1 - d/2
-            similarity = 1 - (dist / 2)
-            
+        for pos in keep:
+            chunk = self.chunks[indices[pos]]
             results.append({
-                "content": chunk["content"],
-                "score": float(similarity),
+                "content": self._get_content(chunk),
+                "score": float(similarities[pos]),
                 "file_id": chunk["file_id"],
                 "chunk_index": chunk["chunk_index"]
             })
-            
-            if len(results) >= top_k:
-                break
         
         logger.info(f"   └─ Found: {len(results)} similar chunks")
         
+        self._search_cache_set(cache_key, results)
         return results
     
+    # ─────────────────────────────────────────────────────────
+    #  ⚡ Search Result Cache
+    # ─────────────────────────────────────────────────────────
+    
+    @staticmethod
+    def _search_cache_key(query_embedding: np.ndarray, top_k: int, file_ids: Optional[List[str]]) -> bytes:
+        digest = hashlib.blake2b(query_embedding.tobytes(), digest_size=16).digest()
+        scope = "|".join(sorted(file_ids)) if file_ids else ""
+        return digest + f"{top_k}:{scope}".encode('utf-8')
+    
+    def _search_cache_get(self, key: bytes) -> Optional[List[Dict]]:
+        with self._search_cache_lock:
+            entry = self._search_cache.get(key)
+            if entry is None:
+                return None
+            results, expiry = entry
+            if time.time() >= expiry:
+                del self._search_cache[key]
+                return None
+            self._search_cache.move_to_end(key)
+        # Shallow copies so callers can annotate results freely
+        return [dict(r) for r in results]
+    
+    def _search_cache_set(self, key: bytes, results: List[Dict]):
+        entry = ([dict(r) for r in results], time.time() + cache_config.QUERY_CACHE_TTL)
+        with self._search_cache_lock:
+            self._search_cache[key] = entry
+            self._search_cache.move_to_end(key)
+            while len(self._search_cache) > cache_config.SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+    
+    def _clear_search_cache(self):
+        with self._search_cache_lock:
+            self._search_cache.clear()
+    
+    def _set_search_params(self):
+        """efSearch for HNSW indexes, nprobe for IVF ones"""
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = settings.HNSW_EF_SEARCH
+            return
+        try:
+            faiss.extract_index_ivf(self.index).nprobe = settings.IVF_NPROBE
+        except RuntimeError:
+            pass  # Not an IVF index
+    
+    def _search_pending(self, query_embedding: np.ndarray, k: int):
+        """
+        Exact scan over vectors still waiting for index training
+        
+        Returns:
+            tuple of (cosine similarities, chunk indices), best first
+        """
+        similarities = self._pending @ query_embedding[0]
+        order = np.argsort(-similarities)[:k]
+        return similarities[order], order
+    
+    def _vectors_for(self, ids: np.ndarray) -> np.ndarray:
+        """Stored (or reconstructed) vectors for chunk ids, for MMR reranking"""
+        if self.quantization == "binary":
+            return _sq8_decode(self.sq8_codes[ids], self.sq8_params[ids])
+        if not self.index.is_trained:
+            return self._pending[ids]
+        try:
+            return self.index.reconstruct_batch(ids)
+        except RuntimeError:
+            # IVF indexes can only reconstruct once they keep an id -> list map
+            faiss.extract_index_ivf(self.index).make_direct_map()
+            return self.index.reconstruct_batch(ids)
+    
+    def _search_binary(self, query_embedding: np.ndarray, k: int):
+        """
+        Hamming search over sign bits, then rescore the candidates
+        against their SQ8 codes
+        
+        Returns:
+            tuple of (cosine similarities, chunk indices), best first
+        """
+        k_coarse = min(k * BINARY_RESCORE_FACTOR, self.index.ntotal)
+        _, candidates = self.index.search(_binarize(query_embedding), k_coarse)
+        candidates = candidates[0][candidates[0] != -1]
+        
+        similarities = _sq8_scores(
+            self.sq8_codes[candidates], self.sq8_params[candidates], query_embedding[0]
+        )
+        order = np.argsort(-similarities)[:k]
+        return similarities[order], candidates[order]
+    
     def get_document_status(self, file_id: str) -> Dict:
         """Get processing status for a document"""
         
         if file_id in self.metadata["documents"]:
             doc = self.metadata["documents"][file_id]
-            return {
+            status = {
                 "status": "completed",
                 "chunks_count": doc["num_chunks"],
                 "upload_date": doc["upload_date"]
             }
+            if file_id in self.partial_files:
+                status["warning"] = self.partial_files[file_id]
+            return status
         elif file_id in self.processing_files:
             return {
                 "status": "processing",
@@ -217,20 +539,57 @@ class VectorStore:
                 "chunks_count": 0
             }
     
+    @property
+    def generation(self) -> str:
+        """
+        Corpus version id, replaced by every add_chunks / clear_all
+        
+        Random rather than a counter, so it never repeats after a clear
+        (which deletes metadata.json) or a restart.
+        """
+        generation = self.metadata.get("generation")
+        if generation is None:
+            generation = self._bump_generation()
+        return generation
+    
+    def _bump_generation(self) -> str:
+        self.metadata["generation"] = uuid.uuid4().hex
+        return self.metadata["generation"]
+    
     def mark_as_processing(self, file_id: str):
         """Mark a file as currently processing"""
         self.processing_files.add(file_id)
         if file_id in self.failed_files:
             del self.failed_files[file_id]
             
+    def register_file(self, file_id: str, file_path: str):
+        """Remember where an uploaded file lives on disk"""
+        self.file_paths[file_id] = file_path
+    
+    def get_file_path(self, file_id: str) -> Optional[str]:
+        """Resolve the on-disk path of an uploaded file without scanning the upload dir"""
+        if file_id in self.file_paths:
+            return self.file_paths[file_id]
+        
+        # Processed documents are stored as {file_id}{ext}
+        doc = self.metadata["documents"].get(file_id)
+        if doc:
+            return os.path.join(settings.UPLOAD_DIR, doc["filename"])
+        
+        return None
+            
     def mark_as_failed(self, file_id: str, error: str):
         """Mark a file as failed processing"""
         self.processing_files.discard(file_id)
         self.failed_files[file_id] = error
     
+    def mark_as_partial(self, file_id: str, error: str):
+        """Record that a file is searchable but missing from a side index"""
+        self.partial_files[file_id] = error
+    
     def get_all_chunks_for_file(self, file_id: str) -> List[str]:
         """Get all chunk contents for a specific file"""
-        return [c["content"] for c in self.chunks if c["file_id"] == file_id]
+        return [self._get_content(self.chunks[i]) for i in self._by_file.get(file_id, ())]
     
     def clear_all(self):
         """
@@ -241,33 +600,54 @@ class VectorStore:
         Removes all vectors, chunks, metadata, and files.
         Use this for starting fresh or clearing old data.
         """
+        if self.read_only:
+            raise RuntimeError("Vector store is read-only (VECTOR_STORE_READ_ONLY=true)")
+        
         logger.info("═" * 60)
         logger.info("🗑️ CLEARING ALL VECTOR STORE DATA")
         logger.info("═" * 60)
         
         # Reset in-memory structures
         self.chunks = []
+        self._by_file = {}
+        self._file_id_code = {}
+        self._chunk_fid_codes = np.empty(0, dtype=np.int32)
         self.metadata = {"documents": {}}
+        self._bump_generation()
         self.processing_files = set()
         self.failed_files = {}
+        self.partial_files = {}
+        self.file_paths = {}
         
         # Recreate FAISS index
         logger.info("🔄 Recreating FAISS index...")
-        self.index = faiss.IndexHNSWFlat(
-            self.dimension,
-            settings.HNSW_M
-        )
-        self.index.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
+        self.index = self._create_index()
+        self._pending = np.empty((0, self.dimension), dtype=np.float32)
+        self._dirty = False
+        self._saved_ntotal = 0
+        self._journaled = 0
+        self._clear_search_cache()
         
         # Delete persisted files
         import shutil
         if os.path.exists(self.index_path):
             os.remove(self.index_path)
-            logger.info("   └─ Deleted: index.faiss")
+            logger.info(f"   └─ Deleted: {os.path.basename(self.index_path)}")
         
-        if os.path.exists(self.chunks_path):
-            os.remove(self.chunks_path)
-            logger.info("   └─ Deleted: chunks.json")
+        for path in (self.sq8_path, self.sq8_params_path):
+            if os.path.exists(path):
+                os.remove(path)
+                logger.info(f"   └─ Deleted: {os.path.basename(path)}")
+        
+        if os.path.exists(self.pending_path):
+            os.remove(self.pending_path)
+            logger.info("   └─ Deleted: pending.npy")
+        
+        self._content_map = None
+        for path in (self.chunks_path, self.legacy_chunks_path, self.content_path):
+            if os.path.exists(path):
+                os.remove(path)
+                logger.info(f"   └─ Deleted: {os.path.basename(path)}")
         
         if os.path.exists(self.metadata_path):
             os.remove(self.metadata_path)
@@ -293,38 +673,145 @@ class VectorStore:
         logger.info("✅ All data cleared successfully")
         logger.info("═" * 60)
     
+    def flush(self):
+        """Persist changes made with add_chunks(..., flush=False)"""
+        if self._dirty:
+            self._save_all()
+    
     def _save_all(self):
         """Persist index and data to disk"""
         
         logger.info("💾 Saving vector store to disk...")
         
-        # Save FAISS index
-        faiss.write_index(self.index, self.index_path)
-        
-        # Save chunks
-        with open(self.chunks_path, 'w', encoding='utf-8') as f:
-            json.dump({"chunks": self.chunks}, f, indent=2, ensure_ascii=False)
+        # Save FAISS index when vectors were added since the last write, and
+        # on the first save: an index still waiting for training has
+        # ntotal == 0 but must exist on disk next to its pending vectors
+        if self.index.ntotal != self._saved_ntotal or not os.path.exists(self.index_path):
+            if self.quantization == "binary":
+                _replace_file(self.index_path, lambda p: faiss.write_index_binary(self.index, p))
+                _replace_file(self.sq8_path, lambda p: _write_npy(p, self.sq8_codes))
+                _replace_file(self.sq8_params_path, lambda p: _write_npy(p, self.sq8_params))
+            else:
+                _replace_file(self.index_path, lambda p: faiss.write_index(self.index, p))
+            self._saved_ntotal = self.index.ntotal
+        
+        # Vectors still waiting for index training
+        if len(self._pending):
+            _replace_file(self.pending_path, lambda p: _write_npy(p, self._pending))
+        elif os.path.exists(self.pending_path):
+            os.remove(self.pending_path)
+        
+        # Append only the chunks added since the last save
+        self._append_journal()
         
         # Save metadata
-        with open(self.metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+        metadata_bytes = orjson.dumps(self.metadata)
+        _replace_file(self.metadata_path, lambda p: _write_bytes(p, metadata_bytes))
         
+        self._dirty = False
         logger.info("   └─ Saved successfully")
     
+    def _append_contents(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """
+        Append chunk texts to chunks.bin in one write
+        
+        Returns:
+            (offset, length) in bytes for each text
+        """
+        encoded = [text.encode('utf-8') for text in texts]
+        spans = []
+        with open(self.content_path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            for data in encoded:
+                spans.append((offset, len(data)))
+                offset += len(data)
+            f.write(b"".join(encoded))
+        return spans
+    
+    def _get_content(self, chunk: Dict) -> str:
+        """Read a chunk's text through a read-only mmap of chunks.bin"""
+        offset = chunk["offset"]
+        end = offset + chunk["length"]
+        if end == offset:
+            return ""
+        content_map = self._content_map
+        if content_map is None or end > len(content_map):
+            # File grew since it was mapped; superseded maps close once unreferenced
+            with open(self.content_path, 'rb') as f:
+                content_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._content_map = content_map
+        return content_map[offset:end].decode('utf-8')
+    
+    def _append_journal(self):
+        """Write new chunks to the end of chunks.jsonl in a single call"""
+        new_chunks = self.chunks[self._journaled:]
+        if not new_chunks:
+            return
+        with open(self.chunks_path, 'ab') as f:
+            f.writelines(orjson.dumps(chunk) + b"\n" for chunk in new_chunks)
+        self._journaled = len(self.chunks)
+    
     def _load_chunks(self):
         """Load chunks from disk"""
         
         if os.path.exists(self.chunks_path):
-            with open(self.chunks_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.chunks = data.get("chunks", [])
+            valid_bytes = 0
+            torn = False
+            with open(self.chunks_path, 'rb') as f:
+                for line in f:
+                    try:
+                        self.chunks.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        torn = True
+                        break
+                    valid_bytes += len(line)
+            if torn:
+                logger.warning(f"⚠️ Dropping incomplete chunk record after {len(self.chunks)} chunks")
+                # Interrupted append: cut the partial record so later appends start clean.
+                # A read-only replica may be looking at the writer's append in
+                # progress, so it only ignores the tail.
+                if not self.read_only:
+                    os.truncate(self.chunks_path, valid_bytes)
+        elif os.path.exists(self.legacy_chunks_path):
+            # Old whole-file chunks.json
+            with open(self.legacy_chunks_path, 'rb') as f:
+                self.chunks = orjson.loads(f.read()).get("chunks", [])
+        
+        # One-time migration of records that still carry their text inline
+        inline = [chunk for chunk in self.chunks if "content" in chunk]
+        if inline and self.read_only:
+            raise RuntimeError(
+                "Vector store needs a one-time chunk migration; "
+                "start a writable instance on this data first"
+            )
+        if inline:
+            spans = self._append_contents([chunk.pop("content") for chunk in inline])
+            for chunk, (offset, length) in zip(inline, spans):
+                chunk["offset"] = offset
+                chunk["length"] = length
+            journal = b"".join(orjson.dumps(chunk) + b"\n" for chunk in self.chunks)
+            _replace_file(self.chunks_path, lambda p: _write_bytes(p, journal))
+            logger.info(f"   └─ Moved {len(inline)} chunk texts to chunks.bin")
+        self._journaled = len(self.chunks)
+        
+        if not self.read_only and os.path.exists(self.legacy_chunks_path):
+            os.remove(self.legacy_chunks_path)
+        
+        self._by_file = {}
+        self._file_id_code = {}
+        codes = []
+        for pos, chunk in enumerate(self.chunks):
+            file_id = chunk["file_id"]
+            self._by_file.setdefault(file_id, []).append(pos)
+            codes.append(self._file_id_code.setdefault(file_id, len(self._file_id_code)))
+        self._chunk_fid_codes = np.array(codes, dtype=np.int32)
     
     def _load_metadata(self):
         """Load metadata from disk"""
         
         if os.path.exists(self.metadata_path):
-            with open(self.metadata_path, 'r', encoding='utf-8') as f:
-                self.metadata = json.load(f)
+            with open(self.metadata_path, 'rb') as f:
+                self.metadata = orjson.loads(f.read())
         else:
             self.metadata = {"documents": {}}
 
@@ -6,8 +6,10 @@
 
 import os
 import uuid
-import glob
-from fastapi import UploadFile, HTTPException
+import shutil
+import asyncio
+from typing import AbstractSet, BinaryIO
+from fastapi import UploadFile, HTTPException, BackgroundTasks
 from config.settings import settings
 from utils.logger import setup_logger
 
@@ -15,17 +17,24 @@ logger = setup_logger()
 
 ALLOWED_EXTENSIONS = {'.pdf', '.txt', '.docx', '.md'}
 
+# Uploads are copied to disk in pieces of this size
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
 
-def validate_file(file: UploadFile):
+
+def validate_file(file: UploadFile) -> str:
     """
     ┌─────────────────────────────────────────────┐
     │  📋 Validate uploaded file                  │
     └─────────────────────────────────────────────┘
+    
+    Returns:
+        the lowercased file extension (e.g. ".pdf")
     """
     
     # Check file extension
     _, ext = os.path.splitext(file.filename or "")
-    if ext.lower() not in ALLOWED_EXTENSIONS:
+    ext = ext.lower()
+    if ext not in ALLOWED_EXTENSIONS:
         logger.warning(f"Rejected file type: {ext}")
         raise HTTPException(
             status_code=400,
@@ -33,48 +42,86 @@ def validate_file(file: UploadFile):
         )
     
     logger.info(f"✅ File validation passed: {file.filename}")
+    
+    return ext
+
+
+def _cleanup_upload_dir(keep: str, in_flight: AbstractSet[str]):
+    """
+    Delete old uploaded files except `keep` (runs after the response is sent)
+    
+    Uploads whose file ID is in `in_flight` (still queued or being
+    parsed) stay.
+    """
+    logger.info("🧹 Cleaning up old uploaded files...")
+    with os.scandir(settings.UPLOAD_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name == keep:
+                continue
+            # Files are saved as {file_id}{ext}
+            if os.path.splitext(entry.name)[0] in in_flight:
+                continue
+            try:
+                os.unlink(entry.path)
+                logger.info(f"   └─ Removed: {entry.name}")
+            except OSError as e:
+                logger.error(f"   └─ Failed to delete {entry.path}: {e}")
 
 
-async def save_upload_file(file: UploadFile) -> tuple[str, str]:
+def _copy_upload(src: BinaryIO, file_path: str):
+    """
+    Copy the spooled upload to file_path in UPLOAD_CHUNK_SIZE pieces
+    
+    Starlette's spool is an anonymous temp file (or still in memory),
+    so it can't be renamed into place.
+    """
+    src.seek(0)
+    with open(file_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+
+
+async def save_upload_file(
+    file: UploadFile,
+    ext: str,
+    background: BackgroundTasks,
+    in_flight: AbstractSet[str] = frozenset()
+) -> tuple[str, str]:
     """
     ┌─────────────────────────────────────────────┐
     │  💾 Save uploaded file to disk              │
     │  Clears old files to keep only latest      │
     └─────────────────────────────────────────────┘
     
+    Args:
+        ext: extension returned by validate_file
+        in_flight: IDs of uploads still being processed; read when the
+            cleanup runs, so pass the live set
+    
     Returns:
         tuple of (file_path, file_id)
     """
     
-    # Clear existing files in upload dir to keep only the latest one
-    logger.info("🧹 Cleaning up old uploaded files...")
-    for old_file in glob.glob(os.path.join(settings.UPLOAD_DIR, "*")):
-        try:
-            os.remove(old_file)
-            logger.info(f"   └─ Removed: {os.path.basename(old_file)}")
-        except Exception as e:
-            logger.error(f"   └─ Failed to delete {old_file}: {e}")
-    
     # Generate unique file ID
     file_id = str(uuid.uuid4())
-    _, ext = os.path.splitext(file.filename or "")
     filename = f"{file_id}{ext}"
     file_path = os.path.join(settings.UPLOAD_DIR, filename)
     
+    # Check file size (the upload is fully spooled by now; nothing is written if too big)
+    size = file.file.seek(0, os.SEEK_END)
+    if size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"❌ File too large. Max size: {settings.MAX_FILE_SIZE / (1024*1024):.1f}MB"
+        )
+    
     # Save file
     logger.info(f"💾 Saving new file: {filename}")
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        
-        # Check file size
-        if len(content) > settings.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"❌ File too large. Max size: {settings.MAX_FILE_SIZE / (1024*1024):.1f}MB"
-            )
-        
-        buffer.write(content)
+    await asyncio.to_thread(_copy_upload, file.file, file_path)
     
     logger.info(f"✅ File saved successfully: {file_path}")
     
+    # Older files are removed off the request path; the new file has a
+    # fresh UUID name, so it can't collide with anything being deleted
+    background.add_task(_cleanup_upload_dir, filename, in_flight)
+    
     return file_path, file_id
@@ -7,10 +7,13 @@
 import logging
 import sys
 import re
-from datetime import datetime
+import time
+from functools import lru_cache
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.theme import Theme
+from config.settings import settings
+from utils.security import REDACTED
 
 # Custom cosmic theme
 cosmic_theme = Theme({
@@ -28,6 +31,47 @@ console = Console(theme=cosmic_theme)
 #  🔒 Security: Hide Sensitive Data
 # ─────────────────────────────────────────────────────────────
 
+# All masking rules in one pattern, so each message is scanned once.
+# Bearer stays case-sensitive, as before; the rest ignore case.
+_SANITIZER = re.compile(
+    r'(?P<azure>(?P<azure_key>AZURE[_-]?OPENAI[_-]?API[_-]?KEY[_-]?[:=]\s*)["\']?[a-zA-Z0-9]{20,}["\']?)'
+    r'|(?P<apikey>(?P<apikey_key>api[_-]?key[_-]?[:=]\s*)["\']?[a-zA-Z0-9]{20,}["\']?)'
+    r'|(?P<secret>(?P<secret_key>(?:secret[_-]?key|token|password|credential)[_-]?[:=]\s*)["\']?[a-zA-Z0-9]{8,}["\']?)'
+    r'|(?P<bearer>(?-i:Bearer)\s+[a-zA-Z0-9\-._~+/]+=*)'
+    r'|(?P<conn>(?P<scheme>mongodb|postgresql|mysql|redis)://[^@]+@)',
+    re.IGNORECASE
+)
+
+
+_BEARER_REDACTED = f"Bearer {REDACTED}"
+_QUOTED_REDACTED = f'"{REDACTED}"'
+
+
+def _redact(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == "bearer":
+        return _BEARER_REDACTED
+    if kind == "conn":
+        return f"{match.group('scheme')}://{REDACTED}@"
+    # API keys, Azure OpenAI keys, generic secrets/tokens: keep the "name=" part
+    return match.group(kind + "_key") + _QUOTED_REDACTED
+
+
+def _sanitize_uncached(message: str) -> str:
+    return _SANITIZER.sub(_redact, message)
+
+
+# Every _SANITIZER match contains one of these (lowercased); messages with
+# none of them are returned as-is without touching the regex or the cache
+_SENTINELS = ('key', 'token', 'secret', 'password', 'credential', 'bearer', '://')
+
+
+# Repeated log lines ("File validation passed", status polls...) skip the
+# regex scan; long one-off messages bypass the cache to bound its memory
+_SANITIZE_CACHE_MAX_LEN = 1024
+_sanitize_cached = lru_cache(maxsize=4096)(_sanitize_uncached)
+
+
 def sanitize_message(message: str) -> str:
     """
     Remove or mask sensitive information from log messages.
@@ -36,47 +80,19 @@ def sanitize_message(message: str) -> str:
     - Tokens
     - Personal information
     """
-    
-    # Mask API keys (various formats)
-    message = re.sub(
-        r'(api[_-]?key[_-]?[:=]\s*)["\']?([a-zA-Z0-9]{20,})["\']?',
-        r'\1"***REDACTED***"',
-        message,
-        flags=re.IGNORECASE
-    )
-    
-    # Mask Azure OpenAI keys
-    message = re.sub(
-        r'(AZURE[_-]?OPENAI[_-]?API[_-]?KEY[_-]?[:=]\s*)["\']?([a-zA-Z0-9]{20,})["\']?',
-        r'\1"***REDACTED***"',
-        message,
-        flags=re.IGNORECASE
-    )
-    
-    # Mask generic secrets/tokens
-    message = re.sub(
-        r'(secret[_-]?key|token|password|credential)([_-]?[:=]\s*)["\']?([a-zA-Z0-9]{8,})["\']?',
-        r'\1\2"***REDACTED***"',
-        message,
-        flags=re.IGNORECASE
-    )
-    
-    # Mask Bearer tokens
-    message = re.sub(
-        r'Bearer\s+[a-zA-Z0-9\-._~+/]+=*',
-        'Bearer ***REDACTED***',
-        message
-    )
-    
-    # Mask connection strings
-    message = re.sub(
-        r'(mongodb|postgresql|mysql|redis)://[^@]+@',
-        r'\1://***REDACTED***@',
-        message,
-        flags=re.IGNORECASE
-    )
-    
-    return message
+    if not isinstance(message, str):
+        message = str(message)
+    lowered = message.lower()
+    if not any(sentinel in lowered for sentinel in _SENTINELS):
+        return message
+    if len(message) > _SANITIZE_CACHE_MAX_LEN:
+        return _sanitize_uncached(message)
+    return _sanitize_cached(message)
+
+
+# INFO/DEBUG lines carry no credentials in this codebase, so by default only
+# WARNING and above (where exception text lands) pay for the sanitizer
+_SANITIZE_ALL_LOGS = settings.SANITIZE_ALL_LOGS
 
 
 class CosmicFormatter(logging.Formatter):
@@ -100,32 +116,35 @@ class CosmicFormatter(logging.Formatter):
     
     RESET = "\\033[0m"
     
+    # color + symbol + " [" per level, so format() does a single lookup
+    # (zip's arguments are evaluated in class scope; the loop body is not)
+    PREFIX = {
+        level: f"{color}{symbol} ["
+        for level, symbol, color in zip(SYMBOLS, SYMBOLS.values(), map(COLORS.get, SYMBOLS))
+    }
+    DEFAULT_PREFIX = "📌 ["
+    
     def format(self, record):
         # Sanitize the message to remove sensitive data
         original_msg = record.getMessage()
-        sanitized_msg = sanitize_message(original_msg)
+        if _SANITIZE_ALL_LOGS or record.levelno >= logging.WARNING:
+            sanitized_msg = sanitize_message(original_msg)
+        else:
+            sanitized_msg = original_msg
         
-        symbol = self.SYMBOLS.get(record.levelno, "📌")
-        color = self.COLORS.get(record.levelno, "")
+        prefix = self.PREFIX.get(record.levelno, self.DEFAULT_PREFIX)
         
-        # Format timestamp
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        # Format timestamp (from the record itself, no datetime object per line)
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
         
         # Create formatted message
-        formatted = f"{color}{symbol} [{timestamp}] {sanitized_msg}{self.RESET}"
+        formatted = f"{prefix}{timestamp}] {sanitized_msg}{self.RESET}"
         
         return formatted
 
 
-def setup_logger(name: str = "cosmic_ai") -> logging.Logger:
-    """
-    Configure and return the cosmic logger with security features
-    
-    ┌─────────────────────────────────────────────┐
-    │  🌟 COSMIC AI Logger                        │
-    │  Beautiful, readable, SECURE output         │
-    └─────────────────────────────────────────────┘
-    """
+def _build_logger(name: str) -> logging.Logger:
+    """Attach the cosmic handler to the named logger (once)"""
     
     logger = logging.getLogger(name)
     
@@ -148,6 +167,26 @@ def setup_logger(name: str = "cosmic_ai") -> logging.Logger:
     return logger
 
 
+# Built once at import (imports are serialized), so concurrent first calls
+# from worker startup can never attach a second handler
+_DEFAULT_LOGGER_NAME = "cosmic_ai"
+_LOGGER = _build_logger(_DEFAULT_LOGGER_NAME)
+
+
+def setup_logger(name: str = _DEFAULT_LOGGER_NAME) -> logging.Logger:
+    """
+    Configure and return the cosmic logger with security features
+    
+    ┌─────────────────────────────────────────────┐
+    │  🌟 COSMIC AI Logger                        │
+    │  Beautiful, readable, SECURE output         │
+    └─────────────────────────────────────────────┘
+    """
+    if name == _DEFAULT_LOGGER_NAME:
+        return _LOGGER
+    return _build_logger(name)
+
+
 def print_banner():
     """Print the cosmic startup banner"""
     
@@ -176,29 +215,45 @@ def print_section(title: str):
     console.print(f"{'─' * 60}", style="dim")
 
 
-def print_success(message: str):
+# Plain ANSI for the one-line helpers below: a single write instead of Rich's
+# markup/measure/render pipeline. Colors match cosmic_theme and, like Rich,
+# are dropped when stdout is not a terminal. Each line is flushed, like the
+# logging StreamHandler does, so piped output (docker, systemd) keeps order.
+_ANSI = sys.stdout.isatty()
+_SUCCESS = "\033[1;32m" if _ANSI else ""   # bold green
+_ERROR = "\033[1;31m" if _ANSI else ""     # bold red
+_INFO = "\033[36m" if _ANSI else ""        # cyan
+_WARNING = "\033[33m" if _ANSI else ""     # yellow
+_RESET = "\033[0m" if _ANSI else ""
+
+
+def print_success(message: str, sanitize: bool = True):
     """Print a success message"""
-    # Sanitize before printing
-    sanitized = sanitize_message(message)
-    console.print(f"  ✅ {sanitized}", style="success")
+    # Sanitize before printing (sanitize=False for callers passing known-safe text)
+    text = sanitize_message(message) if sanitize else message
+    sys.stdout.write(f"{_SUCCESS}  ✅ {text}{_RESET}\n")
+    sys.stdout.flush()
 
 
-def print_error(message: str):
+def print_error(message: str, sanitize: bool = True):
     """Print an error message"""
-    # Sanitize before printing
-    sanitized = sanitize_message(message)
-    console.print(f"  ❌ {sanitized}", style="error")
+    # Sanitize before printing (sanitize=False for callers passing known-safe text)
+    text = sanitize_message(message) if sanitize else message
+    sys.stdout.write(f"{_ERROR}  ❌ {text}{_RESET}\n")
+    sys.stdout.flush()
 
 
-def print_info(message: str):
+def print_info(message: str, sanitize: bool = True):
     """Print an info message"""
-    # Sanitize before printing
-    sanitized = sanitize_message(message)
-    console.print(f"  ℹ️  {sanitized}", style="info")
+    # Sanitize before printing (sanitize=False for callers passing known-safe text)
+    text = sanitize_message(message) if sanitize else message
+    sys.stdout.write(f"{_INFO}  ℹ️  {text}{_RESET}\n")
+    sys.stdout.flush()
 
 
-def print_warning(message: str):
+def print_warning(message: str, sanitize: bool = True):
     """Print a warning message"""
-    # Sanitize before printing
-    sanitized = sanitize_message(message)
-    console.print(f"  ⚠️  {sanitized}", style="warning")
+    # Sanitize before printing (sanitize=False for callers passing known-safe text)
+    text = sanitize_message(message) if sanitize else message
+    sys.stdout.write(f"{_WARNING}  ⚠️  {text}{_RESET}\n")
+    sys.stdout.flush()
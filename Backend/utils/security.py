@@ -0,0 +1,22 @@
+"""
+═══════════════════════════════════════════════════════════════
+ 🌌 COSMIC AI - Secret Masking Helpers
+═══════════════════════════════════════════════════════════════
+"""
+
+from typing import Optional
+
+# Placeholder written wherever a secret is hidden completely
+REDACTED = "***REDACTED***"
+
+
+def mask_secret(secret: Optional[str], keep: int = 6, sep: str = "...") -> str:
+    """
+    Mask a secret for display, keeping `keep` characters at each end.
+
+    Values too short to keep both ends without revealing most of the
+    secret (or keep=0, or a missing value) become REDACTED.
+    """
+    if not secret or keep <= 0 or len(secret) <= 2 * keep:
+        return REDACTED
+    return f"{secret[:keep]}{sep}{secret[-keep:]}"
@@ -9,77 +9,87 @@ from colorama import init, Fore, Style
 
 init(autoreset=True)
 
+# Escape sequences and rules built once, not per printed line
+_RESET = Style.RESET_ALL
+_HEADER_RULE = Fore.CYAN + '=' * 70
+_SECTION_RULE = Fore.MAGENTA + '─' * 70
+_SETTING_TEMPLATE = f"{Fore.GREEN}[✓]{_RESET} {{:30s}}: {Fore.YELLOW}{{}}{{}}{_RESET}"
+_ORIGIN_PREFIX = f"   {Fore.CYAN}└─{_RESET} "
+
 def print_header(text):
-    print(f"\n{Fore.CYAN}{'='*70}")
-    print(f"{Fore.CYAN}{text:^70}")
-    print(f"{Fore.CYAN}{'='*70}{Style.RESET_ALL}\n")
+    print("\n" + _HEADER_RULE)
+    print(Fore.CYAN + f"{text:^70}")
+    print(_HEADER_RULE + _RESET + "\n")
 
 def print_section(text):
-    print(f"\n{Fore.MAGENTA}{'─'*70}")
-    print(f"{Fore.MAGENTA}{text}")
-    print(f"{Fore.MAGENTA}{'─'*70}{Style.RESET_ALL}")
+    print("\n" + _SECTION_RULE)
+    print(Fore.MAGENTA + text)
+    print(_SECTION_RULE + _RESET)
 
 def print_setting(name, value, unit=""):
-    print(f"{Fore.GREEN}[✓]{Style.RESET_ALL} {name:30s}: {Fore.YELLOW}{value}{unit}{Style.RESET_ALL}")
+    print(_SETTING_TEMPLATE.format(name, value, unit))
 
 def verify_configuration():
     """Verify all configuration settings"""
     
+    # One dump of the plain fields; the derived lists are properties, read directly
+    cfg = settings.model_dump()
+    
     print_header("COSMIC AI - CONFIGURATION VERIFICATION")
     
     # Azure OpenAI
     print_section("🔐 Azure OpenAI Configuration")
-    print_setting("API Base", settings.AZURE_OPENAI_API_BASE[:50] + "...")
-    print_setting("Deployment Name", settings.AZURE_OPENAI_DEPLOYMENT_NAME)
-    print_setting("Embedding Deployment", settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
-    print_setting("API Version", settings.AZURE_OPENAI_API_VERSION)
+    print_setting("API Base", cfg['AZURE_OPENAI_API_BASE'][:50] + "...")
+    print_setting("Deployment Name", cfg['AZURE_OPENAI_DEPLOYMENT_NAME'])
+    print_setting("Embedding Deployment", cfg['AZURE_OPENAI_EMBEDDING_DEPLOYMENT'])
+    print_setting("API Version", cfg['AZURE_OPENAI_API_VERSION'])
     
     # GPT-5 Model Configuration
     print_section("🤖 GPT-5 Model Settings")
-    print_setting("Max Completion Tokens", settings.GPT_MAX_COMPLETION_TOKENS)
-    print_setting("Max Context Tokens", f"{settings.GPT_MAX_CONTEXT_TOKENS:,}")
-    print_setting("Reserved Tokens", settings.GPT_RESERVED_TOKENS)
-    print_setting("Temperature", settings.GPT_TEMPERATURE)
-    print_setting("Top-P", settings.GPT_TOP_P)
-    print_setting("Frequency Penalty", settings.GPT_FREQUENCY_PENALTY)
-    print_setting("Presence Penalty", settings.GPT_PRESENCE_PENALTY)
-    print_setting("Stream Enabled", settings.GPT_STREAM_ENABLED)
+    print_setting("Max Completion Tokens", cfg['GPT_MAX_COMPLETION_TOKENS'])
+    print_setting("Max Context Tokens", f"{cfg['GPT_MAX_CONTEXT_TOKENS']:,}")
+    print_setting("Reserved Tokens", cfg['GPT_RESERVED_TOKENS'])
+    print_setting("Temperature", cfg['GPT_TEMPERATURE'])
+    print_setting("Top-P", cfg['GPT_TOP_P'])
+    print_setting("Frequency Penalty", cfg['GPT_FREQUENCY_PENALTY'])
+    print_setting("Presence Penalty", cfg['GPT_PRESENCE_PENALTY'])
+    print_setting("Stream Enabled", cfg['GPT_STREAM_ENABLED'])
     
     # RAG Configuration
     print_section("🧠 RAG Configuration")
-    print_setting("Chunk Size", settings.CHUNK_SIZE, " tokens")
-    print_setting("Chunk Overlap", settings.CHUNK_OVERLAP, " tokens")
-    print_setting("Min Chunk Size", settings.MIN_CHUNK_SIZE, " tokens")
-    print_setting("Top K Results", settings.TOP_K_RESULTS)
-    print_setting("Similarity Threshold", settings.SIMILARITY_THRESHOLD)
-    print_setting("Max Context Chunks", settings.MAX_CONTEXT_CHUNKS)
+    print_setting("Chunk Size", cfg['CHUNK_SIZE'], " tokens")
+    print_setting("Chunk Overlap", cfg['CHUNK_OVERLAP'], " tokens")
+    print_setting("Min Chunk Size", cfg['MIN_CHUNK_SIZE'], " tokens")
+    print_setting("Top K Results", cfg['TOP_K_RESULTS'])
+    print_setting("Similarity Threshold", cfg['SIMILARITY_THRESHOLD'])
+    print_setting("Max Context Chunks", cfg['MAX_CONTEXT_CHUNKS'])
     
     # Vector Database
     print_section("🔍 Vector Database (HNSW)")
-    print_setting("HNSW M (Connections)", settings.HNSW_M)
-    print_setting("HNSW EF Construction", settings.HNSW_EF_CONSTRUCTION)
-    print_setting("HNSW EF Search", settings.HNSW_EF_SEARCH)
-    print_setting("Embedding Dimension", settings.EMBEDDING_DIMENSION)
+    print_setting("HNSW M (Connections)", cfg['HNSW_M'])
+    print_setting("HNSW EF Construction", cfg['HNSW_EF_CONSTRUCTION'])
+    print_setting("HNSW EF Search", cfg['HNSW_EF_SEARCH'])
+    print_setting("Embedding Dimension", cfg['EMBEDDING_DIMENSION'])
     
     # File Upload
     print_section("📁 File Upload Configuration")
-    print_setting("Max File Size", settings.MAX_FILE_SIZE / 1024 / 1024, " MB")
+    print_setting("Max File Size", cfg['MAX_FILE_SIZE_MB'], " MB")
     print_setting("Allowed File Types", ", ".join(settings.ALLOWED_FILE_TYPES_LIST))
-    print_setting("Max Files Per Upload", settings.MAX_FILES_PER_UPLOAD)
+    print_setting("Max Files Per Upload", cfg['MAX_FILES_PER_UPLOAD'])
     
     # Server Configuration
     print_section("🌐 Server Configuration")
-    print_setting("Server Host", settings.SERVER_HOST)
-    print_setting("Server Port", settings.SERVER_PORT)
+    print_setting("Server Host", cfg['SERVER_HOST'])
+    print_setting("Server Port", cfg['SERVER_PORT'])
     print_setting("CORS Origins", len(settings.CORS_ORIGINS), " origins")
     for origin in settings.CORS_ORIGINS:
-        print(f"   {Fore.CYAN}└─{Style.RESET_ALL} {origin}")
+        print(_ORIGIN_PREFIX + origin)
     
     # Logging
     print_section("📊 Logging & Monitoring")
-    print_setting("Log Level", settings.LOG_LEVEL)
-    print_setting("Debug Logging", settings.ENABLE_DEBUG_LOGGING)
-    print_setting("Log API Calls", settings.LOG_API_CALLS)
+    print_setting("Log Level", cfg['LOG_LEVEL'])
+    print_setting("Debug Logging", cfg['ENABLE_DEBUG_LOGGING'])
+    print_setting("Log API Calls", cfg['LOG_API_CALLS'])
     
     # Summary
     print_section("📋 Configuration Summary")
@@ -90,10 +100,10 @@ def verify_configuration():
     
     # Performance estimate
     print(f"\n{Fore.CYAN}Performance Estimates:{Style.RESET_ALL}")
-    print(f"  • Max response length: ~{settings.GPT_MAX_COMPLETION_TOKENS * 0.75:.0f} words")
-    print(f"  • Context window: ~{settings.GPT_MAX_CONTEXT_TOKENS / 1000:.0f}K tokens")
-    print(f"  • Chunk size: ~{settings.CHUNK_SIZE * 0.75:.0f} words per chunk")
-    print(f"  • Retrieved context: ~{settings.TOP_K_RESULTS * settings.CHUNK_SIZE * 0.75:.0f} words")
+    print(f"  • Max response length: ~{cfg['GPT_MAX_COMPLETION_TOKENS'] * 0.75:.0f} words")
+    print(f"  • Context window: ~{cfg['GPT_MAX_CONTEXT_TOKENS'] / 1000:.0f}K tokens")
+    print(f"  • Chunk size: ~{cfg['CHUNK_SIZE'] * 0.75:.0f} words per chunk")
+    print(f"  • Retrieved context: ~{cfg['TOP_K_RESULTS'] * cfg['CHUNK_SIZE'] * 0.75:.0f} words")
     
     print(f"\n{Fore.GREEN}{'='*70}")
     print(f"{Fore.GREEN}{'Configuration verified and ready to use!':^70}")